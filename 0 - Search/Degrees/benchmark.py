@@ -0,0 +1,185 @@
+"""
+Measures how quickly breadth-first search expands people and how much
+memory the loaded data takes, on the small dataset and on a synthetic
+dataset of configurable size.
+"""
+
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+import snapshot
+import util
+from nameindex import NameIndex
+
+
+class ListQueueFrontier():
+    """
+    The original list-backed frontier, kept as a point of comparison.
+    """
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def write_synthetic(directory, num_people, num_movies, stars_per_movie,
+                    seed=0):
+    """
+    Write people, movies and stars CSV files with a random cast per movie.
+    """
+    rng = random.Random(seed)
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            writer.writerow([i, f"Person {i}", 1900 + i % 100])
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(num_movies):
+            writer.writerow([i, f"Movie {i}", 1900 + i % 120])
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for i in range(num_movies):
+            for _ in range(stars_per_movie):
+                writer.writerow([rng.randrange(num_people), i])
+
+
+def reset():
+    """
+    Forget any data previously loaded into degrees.
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+    degrees.name_index = NameIndex()
+
+
+def load(label, directory, compact, use_snapshot=False):
+    """
+    Load a dataset and report the time and memory it took.
+    Memory is traced in a second load, since tracing slows loading down.
+    """
+    reset()
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact, use_snapshot=use_snapshot)
+    elapsed = time.perf_counter() - start
+
+    reset()
+    tracemalloc.start()
+    degrees.load_data(directory, compact=compact, use_snapshot=use_snapshot)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  {label:<28} {current / 2 ** 20:>9.1f} MiB "
+          f"{elapsed:>8.3f}s")
+    if compact:
+        print(f"  {'  of which CSR arrays':<28} "
+              f"{degrees.graph.nbytes() / 2 ** 20:>9.1f} MiB")
+
+
+def run(label, queries, search, frontier=util.QueueFrontier):
+    """
+    Run `search` on every query and report expanded people per second.
+    """
+    expanded = 0
+    neighbors_for_person = degrees.neighbors_for_person
+
+    def counting_neighbors(person_id):
+        nonlocal expanded
+        expanded += 1
+        return neighbors_for_person(person_id)
+
+    degrees.neighbors_for_person = counting_neighbors
+    degrees.QueueFrontier = frontier
+    start = time.perf_counter()
+    try:
+        for source, target in queries:
+            search(source, target)
+    finally:
+        elapsed = time.perf_counter() - start
+        degrees.neighbors_for_person = neighbors_for_person
+        degrees.QueueFrontier = util.QueueFrontier
+    rate = expanded / elapsed if elapsed else float("inf")
+    print(f"  {label:<28} {expanded:>9} expanded "
+          f"{elapsed:>8.3f}s {rate:>12.0f}/s")
+
+
+def timed(label, queries, search):
+    """
+    Run `search` on every query and report the time per query.
+    """
+    start = time.perf_counter()
+    for source, target in queries:
+        search(source, target)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed / len(queries) * 1000:>9.3f} ms/query")
+
+
+def benchmark(title, directory, queries, baseline=True):
+    print(f"{title} ({len(queries)} queries)")
+    load("load (dictionaries)", directory, compact=False)
+    if baseline:
+        run("shortest_path (list)", queries,
+            degrees.shortest_path, ListQueueFrontier)
+    run("shortest_path (deque)", queries, degrees.shortest_path)
+    timed("bidirectional", queries, degrees.bidirectional_shortest_path)
+    load("load (compact)", directory, compact=True)
+    snapshot.save(degrees.graph, directory)
+    load("load (snapshot)", directory, compact=True, use_snapshot=True)
+    timed("bidirectional (compact)", queries,
+          degrees.bidirectional_shortest_path)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [num_people]")
+    num_people = int(sys.argv[1]) if len(sys.argv) == 2 else 5000
+
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for filename in snapshot.SOURCES:
+            shutil.copy2(os.path.join("small", filename), directory)
+        degrees.load_data(directory)
+        people = sorted(degrees.people)
+        benchmark("small", directory,
+                  [(s, t) for s in people for t in people])
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_synthetic(directory, num_people, num_people // 2, 4)
+        people = [str(i) for i in range(num_people)]
+        benchmark(f"synthetic, {num_people} people", directory,
+                  [(rng.choice(people), rng.choice(people))
+                   for _ in range(20)],
+                  baseline=num_people <= 10000)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,69 @@
+import argparse
 import csv
+import io
+import json
+import multiprocessing
+import os
 import sys
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+from graph import CompactGraph
+from landmarks import LandmarkOracle
+from nameindex import NameIndex
+from util import Node, PathCache, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
+# Sorted index of all names, for prefix and fuzzy lookups
+name_index = NameIndex()
+
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
 people = {}
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Recently answered queries, shared by cached_shortest_path calls
+path_cache = PathCache(capacity=10000)
+
+# Distance oracle built by build_landmarks, used to bound and prune searches
+landmark_oracle = None
+
+# Byte offset in stars.csv up to which rows have been loaded
+stars_offset = 0
+
+# Compact integer-indexed star graph, used instead of the two dictionaries
+# above when data is loaded with compact=True
+graph = None
+
 
-def load_data(directory):
+def load_data(directory, compact=False, use_snapshot=True):
     """
     Load data from CSV files into memory.
+    With `compact`, people and movies are kept in a CompactGraph instead,
+    read from a binary snapshot of the CSV files when an up-to-date one
+    exists, and otherwise parsed from the CSV files and then snapshotted.
     """
+    global graph, stars_offset
+    if compact:
+        graph = snapshot.load(directory) if use_snapshot else None
+        if graph is None:
+            graph = CompactGraph.from_csv(directory)
+            if use_snapshot:
+                try:
+                    snapshot.save(graph, directory)
+                except OSError:
+                    pass
+        # The graph (or its snapshot) covers stars.csv as it is now
+        stars_offset = os.path.getsize(f"{directory}/stars.csv")
+
+        # Tuples take a fraction of the memory of one-element sets
+        for person_id, name in zip(graph.person_ids, graph.person_names):
+            key = name.lower()
+            names[key] = names.get(key, ()) + (person_id,)
+            name_index.add(name, person_id)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -29,6 +77,7 @@ def load_data(directory):
                 names[row["name"].lower()] = {row["id"]}
             else:
                 names[row["name"].lower()].add(row["id"])
+            name_index.add(row["name"], row["id"])
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
@@ -49,17 +98,120 @@ def load_data(directory):
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
             except KeyError:
                 pass
+        stars_offset = f.tell()
+
+
+def update_data(directory):
+    """
+    Load the rows appended to stars.csv since the data was loaded or last
+    updated, and drop only the cached paths the new stars may shorten.
+    Returns the number of new stars.
+    """
+    global stars_offset
+    with open(f"{directory}/stars.csv", "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        f.seek(stars_offset)
+        data = f.read()
+
+    # Leave any partially written last row for the next update
+    end = data.rfind(b"\n") + 1
+    stars_offset += end
+    person_column = header.index("person_id")
+    movie_column = header.index("movie_id")
+
+    # People whose cached paths the new stars may change, and whether any
+    # of the new stars may also change paths between other people
+    added = 0
+    touched = set()
+    shortens = False
+    for row in csv.reader(io.StringIO(data[:end].decode("utf-8"))):
+        # Skip blank and malformed rows
+        if len(row) <= max(person_column, movie_column):
+            continue
+        person_id = row[person_column]
+        movie_id = row[movie_column]
+        if not is_person(person_id) or not is_movie(movie_id):
+            continue
+
+        # Note what the person and movie were connected to beforehand
+        had_movies = bool(movies_for_person(person_id))
+        cast = stars_for_movie(movie_id)
+        if person_id in cast:
+            continue
+        if graph is not None:
+            graph.add_star(person_id, movie_id)
+        else:
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+        added += 1
+
+        # A movie's first star connects nobody
+        if not cast:
+            continue
+        touched.add(person_id)
+        # New co-stars of a person already in movies may shorten any path
+        # of two or more steps, or connect people who were not connected
+        # before. A previously isolated person cannot shorten a path
+        # through them, only paths to or from them
+        if had_movies:
+            shortens = True
+        if landmark_oracle is not None:
+            landmark_oracle.add_cast(cast + [person_id], neighbors_for_person)
+
+    # Scan the cache once for the whole update rather than once per row
+    if touched:
+        path_cache.invalidate(lambda source, target, path: (
+            (shortens and (path is None or len(path) > 1))
+            or source in touched or target in touched))
+
+    return added
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the star graph in compact integer arrays")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="always parse the CSV files in compact mode")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer the source,target person ID pairs in "
+                             "FILE (- for standard input) as JSON lines")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="search distinct sources of a batch "
+                             "in N processes")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K",
+                        help="precompute distances from K landmark people "
+                             "to estimate and prune searches")
+    args = parser.parse_args()
+    if args.batch and args.landmarks > 0:
+        # A batch reads all targets of a source off one full search tree,
+        # which landmark bounds cannot prune
+        parser.error("--landmarks cannot be used with --batch")
+
+    # Keep standard output for results when answering a batch
+    log = sys.stderr if args.batch else sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    load_data(args.directory, compact=args.compact,
+              use_snapshot=not args.no_snapshot)
+    print("Data loaded.", file=log)
+
+    if args.landmarks > 0:
+        print("Building landmarks...", file=log)
+        build_landmarks(args.landmarks)
+
+    if args.batch:
+        if args.batch == "-":
+            queries = read_queries(sys.stdin)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                queries = read_queries(f)
+        answers = batch_shortest_paths(queries, processes=args.workers)
+        for source, target, path in answers:
+            print(json.dumps(query_result(source, target, path)), flush=True)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -68,7 +220,13 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if landmark_oracle is not None:
+        lower, upper = estimate_degrees(source, target)
+        if lower is not None:
+            print(f"Estimate: between {lower} and "
+                  f"{'?' if upper is None else upper} degrees.")
+
+    path = cached_shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -77,9 +235,9 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = get_person(path[i][1])["name"]
+            person2 = get_person(path[i + 1][1])["name"]
+            movie = get_movie(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
@@ -111,7 +269,7 @@ def shortest_path(source, target):
         node = frontier.remove()
 
         # Add state to the explored set
-        explored.add(node)
+        explored.add(node.state)
 
         # Check if current node offers a solution link to the target
         if node.state == target:
@@ -140,18 +298,327 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def bidirectional_shortest_path(source, target, keep=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one breadth-first
+    frontier from each end until the two meet in the middle.
+    If given, `keep` is a pair of functions (one per direction) called
+    with a newly reached person and their depth; people for which it
+    returns False are left unexpanded.
+    If there is no possible path, returns None.
+    """
+    if graph is not None and keep is None:
+        return graph.shortest_path(source, target)
+
+    if source == target:
+        return []
+
+    keep_forward, keep_backward = keep or (None, None)
+
+    # Map each reached state to its node, one dictionary per direction
+    forward = {source: Node(state=source, parent=None, action=None)}
+    backward = {target: Node(state=target, parent=None, action=None)}
+
+    # Each frontier holds the nodes of the most recently reached layer
+    forward_layer = [forward[source]]
+    backward_layer = [backward[target]]
+
+    # Depth of the current layer on each side
+    forward_depth = 0
+    backward_depth = 0
+
+    while forward_layer and backward_layer:
+
+        # Always expand the smaller layer, which keeps both searches shallow
+        if len(forward_layer) <= len(backward_layer):
+            forward_depth += 1
+            forward_layer = expand_layer(
+                forward_layer, forward, keep_forward, forward_depth)
+            meeting = [node.state for node in forward_layer
+                       if node.state in backward]
+        else:
+            backward_depth += 1
+            backward_layer = expand_layer(
+                backward_layer, backward, keep_backward, backward_depth)
+            meeting = [node.state for node in backward_layer
+                       if node.state in forward]
+
+        # The first layer touching the other side contains the solution
+        if meeting:
+            state = min(meeting, key=lambda state: (
+                depth_of(forward[state]) + depth_of(backward[state])))
+            return join_paths(forward[state], backward[state])
+
+    # One of the two sides ran out of people to explore
+    return None
+
+
+def cached_shortest_path(source, target):
+    """
+    Returns the same path as bidirectional_shortest_path, answering from
+    path_cache when the pair, in either direction, was recently asked for.
+    Once landmarks are built, searches are pruned with them.
+    """
+    found, path = path_cache.get(source, target)
+    if not found:
+        if landmark_oracle is not None:
+            path = landmark_shortest_path(source, target)
+        else:
+            path = bidirectional_shortest_path(source, target)
+        path_cache.put(source, target, path)
+    return path
+
+
+def build_landmarks(k=16):
+    """
+    Precomputes distances from the k people with the most movies to
+    everyone else, for estimate_degrees and landmark_shortest_path.
+    """
+    global landmark_oracle
+    if graph is not None:
+        offsets = graph.person_offsets
+        index = graph.person_index
+        person_ids = graph.person_ids
+
+        def degree(person_id):
+            i = index[person_id]
+            return offsets[i + 1] - offsets[i]
+    else:
+        person_ids = list(people)
+
+        def degree(person_id):
+            return len(people[person_id]["movies"])
+
+    landmark_oracle = LandmarkOracle(
+        person_ids, neighbors_for_person, degree, k)
+
+
+def estimate_degrees(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people without searching. `upper` is None if unknown, and both are
+    None if the two people are known not to be connected.
+    """
+    if landmark_oracle is None:
+        raise Exception("landmarks not built")
+    return landmark_oracle.bounds(source, target)
+
+
+def landmark_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, like bidirectional_shortest_path,
+    but leaves unexpanded every person whose landmark lower bound shows
+    they cannot lie on a path within the landmark upper bound.
+    If there is no possible path, returns None.
+    """
+    lower, upper = estimate_degrees(source, target)
+    if lower is None:
+        return None
+    if upper is None or lower == upper == 1:
+        return bidirectional_shortest_path(source, target)
+
+    to_target = landmark_oracle.lower_bounds(target)
+    to_source = landmark_oracle.lower_bounds(source)
+
+    # The compact graph and the oracle index people the same way
+    if graph is not None:
+        return graph.shortest_path(source, target, keep=(
+            lambda person, depth: depth + to_target(person) <= upper,
+            lambda person, depth: depth + to_source(person) <= upper,
+        ))
+
+    index = landmark_oracle.index
+    return bidirectional_shortest_path(source, target, keep=(
+        lambda state, depth: depth + to_target(index[state]) <= upper,
+        lambda state, depth: depth + to_source(index[state]) <= upper,
+    ))
+
+
+def expand_layer(layer, reached, keep=None, depth=None):
+    """
+    Expands every node of a breadth-first layer, recording new states
+    in `reached` and returning the list of nodes of the next layer.
+    States for which keep(state, depth) is False are not added.
+    """
+    next_layer = []
+    for node in layer:
+        for movie, state in neighbors_for_person(node.state):
+            if state not in reached:
+                if keep is not None and not keep(state, depth):
+                    continue
+                child = Node(state=state, parent=node, action=movie)
+                reached[state] = child
+                next_layer.append(child)
+    return next_layer
+
+
+def depth_of(node):
+    """
+    Returns the number of steps from a node back to its root.
+    """
+    depth = 0
+    while node.parent is not None:
+        depth += 1
+        node = node.parent
+    return depth
+
+
+def join_paths(forward_node, backward_node):
+    """
+    Joins the source-side and target-side chains meeting at the same person
+    into a single list of (movie_id, person_id) pairs from source to target.
+    """
+    # Trace back the source side, as shortest_path does
+    path = []
+    node = forward_node
+    while node.parent is not None:
+        path.append((node.action, node.state))
+        node = node.parent
+    path.reverse()
+
+    # Walk the target side forwards: each step stars the parent with the child
+    node = backward_node
+    while node.parent is not None:
+        path.append((node.action, node.parent.state))
+        node = node.parent
+    return path
+
+
+def batch_shortest_paths(queries, processes=1):
+    """
+    Yields (source, target, path) for every (source, target) pair in
+    `queries`, running a single breadth-first search per distinct source.
+    Results are grouped by source, in order of each source's first query.
+    With more than one process, sources are searched in a process pool.
+    """
+    groups = group_by_source(queries)
+    if processes > 1 and len(groups) > 1 and can_fork():
+        results = pool_map(answer_source, groups, processes)
+    else:
+        results = (answer_source(group) for group in groups)
+    for answers in results:
+        yield from answers
+
+
+def group_by_source(queries):
+    """
+    Returns a list of (source, targets) pairs, one per distinct source.
+    """
+    targets_by_source = {}
+    for source, target in queries:
+        targets_by_source.setdefault(source, []).append(target)
+    return list(targets_by_source.items())
+
+
+def answer_source(group):
+    """
+    Returns the (source, target, path) answers for one source's targets.
+    """
+    source, targets = group
+    if not is_person(source):
+        return [(source, target, None) for target in targets]
+    paths = paths_from(source, [t for t in targets if is_person(t)])
+    return [(source, target, paths.get(target)) for target in targets]
+
+
+def can_fork():
+    """
+    Returns True if worker processes can inherit the loaded data by forking.
+    """
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def pool_map(function, items, processes):
+    """
+    Yields function(item) for every item, in order, computed by a pool of
+    forked processes. Workers inherit the loaded data (and any memory-mapped
+    snapshot) from this process, so none of it is pickled.
+    """
+    context = multiprocessing.get_context("fork")
+    chunksize = max(1, len(items) // (processes * 8))
+    with context.Pool(processes) as pool:
+        yield from pool.imap(function, items, chunksize)
+
+
+def paths_from(source, targets):
+    """
+    Returns a dictionary mapping each of the `targets` connected to the
+    source to a shortest path to it, all read off one breadth-first tree.
+    """
+    if graph is not None:
+        return graph.paths_from(source, targets)
+
+    remaining = set(targets)
+    paths = {}
+
+    # Grow the tree layer by layer until every target has been reached
+    frontier = QueueFrontier()
+    frontier.add(Node(state=source, parent=None, action=None))
+    reached = {source}
+    while remaining and not frontier.empty():
+        node = frontier.remove()
+        if node.state in remaining:
+            remaining.remove(node.state)
+            paths[node.state] = trace_path(node)
+        for movie, state in neighbors_for_person(node.state):
+            if state not in reached:
+                reached.add(state)
+                frontier.add(Node(state=state, parent=node, action=movie))
+    return paths
+
+
+def trace_path(node):
+    """
+    Returns the (movie_id, person_id) pairs leading from the root to a node.
+    """
+    path = []
+    while node.parent is not None:
+        path.append((node.action, node.state))
+        node = node.parent
+    path.reverse()
+    return path
+
+
+def read_queries(f):
+    """
+    Reads (source, target) person ID pairs from an open CSV file,
+    skipping blank lines. A missing ID is read as an empty one, so its
+    line gets a "Person not found." result rather than ending the batch.
+    """
+    return [(row[0].strip(), row[1].strip() if len(row) > 1 else "")
+            for row in csv.reader(f) if row]
+
+
+def query_result(source, target, path):
+    """
+    Returns a JSON-serializable dictionary describing the answer to a query.
+    """
+    result = {"source": source, "target": target}
+    if not (is_person(source) and is_person(target)):
+        result["error"] = "Person not found."
+    result["degrees"] = None if path is None else len(path)
+    result["path"] = path
+    return result
+
+
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+    Unless `interactive`, ambiguous names return None instead of prompting;
+    see find_people for the ranked candidates.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and not interactive:
+        return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = get_person(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -166,11 +633,50 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def find_people(name, limit=10, max_distance=2):
+    """
+    Returns up to `limit` candidates for a (partial or misspelled) name,
+    as dictionaries with the person's id, name, birth and the edit
+    distance to their name. Names that start with `name` come first,
+    shortest first. Only if there are fewer than `limit` of them are names
+    within `max_distance` edits of `name` looked for, closest first, as
+    the fuzzy lookup costs far more than the prefix one.
+    """
+    # Distance and name of each candidate, by person
+    distances = {}
+    for key, person_id in name_index.prefix(name, limit):
+        distances[person_id] = (len(key) - len(name), key)
+    ranked = sorted(distances.items(), key=lambda item: item[1])
+
+    if len(ranked) < limit:
+        fuzzy = {}
+        # Some of the closest names may be prefix matches already
+        for distance, key, person_id in name_index.fuzzy(
+                name, max_distance, limit + len(ranked)):
+            if person_id not in distances:
+                fuzzy[person_id] = (distance, key)
+        ranked += sorted(fuzzy.items(), key=lambda item: item[1])
+
+    candidates = []
+    for person_id, (distance, _) in ranked[:limit]:
+        person = get_person(person_id)
+        candidates.append({
+            "id": person_id,
+            "name": person["name"],
+            "birth": person["birth"],
+            "distance": distance,
+        })
+    return candidates
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -179,6 +685,62 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def is_person(person_id):
+    """
+    Returns True if the person ID exists in the loaded data.
+    """
+    if graph is not None:
+        return person_id in graph.person_index
+    return person_id in people
+
+
+def is_movie(movie_id):
+    """
+    Returns True if the movie ID exists in the loaded data.
+    """
+    if graph is not None:
+        return movie_id in graph.movie_index
+    return movie_id in movies
+
+
+def movies_for_person(person_id):
+    """
+    Returns the list of movie_ids a person starred in.
+    """
+    if graph is not None:
+        return [graph.movie_ids[movie] for movie in
+                graph.movies_of(graph.person_index[person_id])]
+    return list(people[person_id]["movies"])
+
+
+def stars_for_movie(movie_id):
+    """
+    Returns the list of person_ids starring in a movie.
+    """
+    if graph is not None:
+        return [graph.person_ids[person] for person in
+                graph.stars_of(graph.movie_index[movie_id])]
+    return list(movies[movie_id]["stars"])
+
+
+def get_person(person_id):
+    """
+    Returns a dictionary with at least the name and birth of a person.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def get_movie(movie_id):
+    """
+    Returns a dictionary with at least the title and year of a movie.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
+
 if __name__ == "__main__":
     main()
     
\ No newline at end of file
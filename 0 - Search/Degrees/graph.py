@@ -0,0 +1,393 @@
+"""
+Compact representation of the people-movies star graph.
+
+Person and movie IDs are interned to dense integers, and the bipartite
+graph is stored in compressed sparse row (CSR) form: for each person,
+`person_offsets[p]:person_offsets[p + 1]` delimits that person's movies
+inside `person_movies`, and likewise `movie_offsets` and `movie_stars`
+for the stars of each movie.
+"""
+
+import csv
+from array import array
+
+# Typecode used for every index array (4-byte signed integers)
+INDEX = "i"
+
+
+class CompactGraph():
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Map string IDs back to their dense integer index
+        self.person_index = {
+            person_id: i for i, person_id in enumerate(person_ids)
+        }
+        self.movie_index = {
+            movie_id: i for i, movie_id in enumerate(movie_ids)
+        }
+
+        # Stars added after loading, which the CSR arrays cannot hold
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Build a compact graph straight from the CSV files in `directory`.
+        """
+        # Share one string object between all equal birth and release years
+        years = {}
+
+        person_ids, person_names, person_births = [], [], []
+        for person_id, name, birth in read_rows(directory, "people.csv",
+                                                "id", "name", "birth"):
+            person_ids.append(person_id)
+            person_names.append(name)
+            person_births.append(years.setdefault(birth, birth))
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        for movie_id, title, year in read_rows(directory, "movies.csv",
+                                               "id", "title", "year"):
+            movie_ids.append(movie_id)
+            movie_titles.append(title)
+            movie_years.append(years.setdefault(year, year))
+
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # Collect every (person, movie) edge as two parallel integer arrays
+        edge_people = array(INDEX)
+        edge_movies = array(INDEX)
+        for person_id, movie_id in read_rows(directory, "stars.csv",
+                                             "person_id", "movie_id"):
+            try:
+                person = person_index[person_id]
+                movie = movie_index[movie_id]
+            except KeyError:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+        person_offsets, person_movies = build_csr(
+            len(person_ids), edge_people, edge_movies)
+        del edge_people, edge_movies
+        movie_offsets, movie_stars = transpose_csr(
+            len(movie_ids), person_offsets, person_movies)
+
+        graph = cls(person_ids, person_names, person_births,
+                    movie_ids, movie_titles, movie_years,
+                    person_offsets, person_movies, movie_offsets, movie_stars)
+        # Reuse the dictionaries built while reading the stars
+        graph.person_index = person_index
+        graph.movie_index = movie_index
+        return graph
+
+    def person(self, person_id):
+        """
+        Returns the name and birth of a person, given their string ID.
+        """
+        i = self.person_index[person_id]
+        return {"name": self.person_names[i], "birth": self.person_births[i]}
+
+    def movie(self, movie_id):
+        """
+        Returns the title and year of a movie, given its string ID.
+        """
+        i = self.movie_index[movie_id]
+        return {"title": self.movie_titles[i], "year": self.movie_years[i]}
+
+    def movies_of(self, person):
+        """
+        Returns the indices of the movies a person (by index) starred in.
+        """
+        offsets = self.person_offsets
+        movies = self.person_movies[offsets[person]:offsets[person + 1]]
+        if person in self.extra_movies:
+            return list(movies) + self.extra_movies[person]
+        return movies
+
+    def stars_of(self, movie):
+        """
+        Returns the indices of the people starring in a movie (by index).
+        """
+        offsets = self.movie_offsets
+        stars = self.movie_stars[offsets[movie]:offsets[movie + 1]]
+        if movie in self.extra_stars:
+            return list(stars) + self.extra_stars[movie]
+        return stars
+
+    def add_star(self, person_id, movie_id):
+        """
+        Records that a person starred in a movie, given their string IDs.
+        Returns False if either is unknown or the star was already known.
+        """
+        try:
+            person = self.person_index[person_id]
+            movie = self.movie_index[movie_id]
+        except KeyError:
+            return False
+        if movie in self.movies_of(person):
+            return False
+        self.extra_movies.setdefault(person, []).append(movie)
+        self.extra_stars.setdefault(movie, []).append(person)
+        return True
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person, like degrees.neighbors_for_person.
+        """
+        neighbors = set()
+        for movie in self.movies_of(self.person_index[person_id]):
+            movie_id = self.movie_ids[movie]
+            for person in self.stars_of(movie):
+                neighbors.add((movie_id, self.person_ids[person]))
+        return neighbors
+
+    def shortest_path(self, source, target, keep=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, given their string IDs.
+        See search for `keep`.
+        If there is no possible path, returns None.
+        """
+        path = self.search(self.person_index[source],
+                           self.person_index[target], keep)
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+    def paths_from(self, source, targets):
+        """
+        Returns a dictionary mapping each of the `targets` (string IDs)
+        connected to the source to a shortest path to it, all read off
+        one breadth-first tree.
+        """
+        source = self.person_index[source]
+        remaining = {self.person_index[target] for target in targets}
+
+        # Grow the tree a layer at a time until every target is reached
+        reached = {source: None}
+        scanned = set()
+        layer = [source]
+        found = []
+        while layer:
+            found.extend(p for p in layer if p in remaining)
+            remaining.difference_update(layer)
+            if not remaining:
+                break
+            layer = self.expand_layer(layer, reached, scanned)
+
+        paths = {}
+        for person in found:
+            path = trace_chain(reached, person)
+            paths[self.person_ids[person]] = [
+                (self.movie_ids[movie], self.person_ids[star])
+                for movie, star in path
+            ]
+        return paths
+
+    def search(self, source, target, keep=None):
+        """
+        Bidirectional breadth-first search between two person indices.
+        If given, `keep` is a pair of functions (one per direction) called
+        with a newly reached person index and their depth; people for which
+        it returns False are left unexpanded.
+        Returns a list of (movie, person) index pairs, or None.
+        """
+        if source == target:
+            return []
+
+        keep_forward, keep_backward = keep or (None, None)
+
+        # Map each reached person to the (movie, person) step it came from
+        forward = {source: None}
+        backward = {target: None}
+
+        # Movies whose cast has already been scanned on each side
+        forward_movies = set()
+        backward_movies = set()
+
+        forward_layer = [source]
+        backward_layer = [target]
+        forward_depth = 0
+        backward_depth = 0
+
+        while forward_layer and backward_layer:
+
+            # Always expand the smaller layer, as degrees does
+            if len(forward_layer) <= len(backward_layer):
+                forward_depth += 1
+                forward_layer = self.expand_layer(
+                    forward_layer, forward, forward_movies,
+                    keep_forward, forward_depth)
+                meeting = [p for p in forward_layer if p in backward]
+            else:
+                backward_depth += 1
+                backward_layer = self.expand_layer(
+                    backward_layer, backward, backward_movies,
+                    keep_backward, backward_depth)
+                meeting = [p for p in backward_layer if p in forward]
+
+            if meeting:
+                person = min(meeting, key=lambda p: (
+                    chain_length(forward, p) + chain_length(backward, p)))
+                return join_chains(forward, backward, person)
+
+        return None
+
+    def expand_layer(self, layer, reached, scanned, keep=None, depth=None):
+        """
+        Expands a layer of person indices, recording parents in `reached`.
+        Each movie's cast is scanned at most once per search.
+        People for which keep(person, depth) is False are not added.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        extra_movies = self.extra_movies
+        extra_stars = self.extra_stars
+
+        next_layer = []
+        for person in layer:
+            movies = person_movies[person_offsets[person]:
+                                   person_offsets[person + 1]]
+            if extra_movies and person in extra_movies:
+                movies = list(movies) + extra_movies[person]
+            for movie in movies:
+                if movie in scanned:
+                    continue
+                scanned.add(movie)
+                stars = movie_stars[movie_offsets[movie]:
+                                    movie_offsets[movie + 1]]
+                if extra_stars and movie in extra_stars:
+                    stars = list(stars) + extra_stars[movie]
+                for star in stars:
+                    if star not in reached:
+                        if keep is not None and not keep(star, depth):
+                            continue
+                        reached[star] = (movie, person)
+                        next_layer.append(star)
+        return next_layer
+
+    def nbytes(self):
+        """
+        Returns the number of bytes held by the CSR index arrays.
+        """
+        return sum(a.itemsize * len(a) for a in (
+            self.person_offsets, self.person_movies,
+            self.movie_offsets, self.movie_stars))
+
+
+def read_rows(directory, filename, *columns):
+    """
+    Yields the given columns of every row of a CSV file, as tuples,
+    skipping rows too short to hold them.
+    Much cheaper than csv.DictReader, which builds a dictionary per row.
+    """
+    with open(f"{directory}/{filename}", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        width = max(positions) + 1
+        for row in reader:
+            if len(row) >= width:
+                yield tuple(row[i] for i in positions)
+
+
+def build_csr(num_rows, rows, columns):
+    """
+    Groups `columns` by `rows` into CSR offset and index arrays,
+    dropping duplicate entries within each row.
+    """
+    # Count entries per row, then turn counts into starting offsets
+    offsets = array(INDEX, bytes(array(INDEX).itemsize * (num_rows + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(num_rows):
+        offsets[i + 1] += offsets[i]
+
+    # Place every column at the next free slot of its row
+    indices = array(INDEX, bytes(array(INDEX).itemsize * len(columns)))
+    cursor = array(INDEX, offsets)
+    for row, column in zip(rows, columns):
+        indices[cursor[row]] = column
+        cursor[row] += 1
+
+    # Sort each row and squeeze out duplicates in place
+    end = 0
+    start = offsets[0]
+    for i in range(num_rows):
+        stop = offsets[i + 1]
+        unique = sorted(set(indices[start:stop]))
+        offsets[i] = end
+        indices[end:end + len(unique)] = array(INDEX, unique)
+        end += len(unique)
+        start = stop
+    offsets[num_rows] = end
+    del indices[end:]
+    return offsets, indices
+
+
+def transpose_csr(num_columns, offsets, indices):
+    """
+    Returns the CSR arrays of the transposed relation.
+    """
+    rows = array(INDEX)
+    for row in range(len(offsets) - 1):
+        rows.extend([row] * (offsets[row + 1] - offsets[row]))
+    return build_csr(num_columns, indices, rows)
+
+
+def chain_length(reached, person):
+    """
+    Returns the number of steps from a person back to the root of a search.
+    """
+    length = 0
+    while reached[person] is not None:
+        length += 1
+        person = reached[person][1]
+    return length
+
+
+def trace_chain(reached, person):
+    """
+    Returns the (movie, person) index pairs leading from the root of a
+    search to `person`.
+    """
+    path = []
+    while reached[person] is not None:
+        movie, parent = reached[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+    return path
+
+
+def join_chains(forward, backward, person):
+    """
+    Joins the two search trees at `person` into a source-to-target path
+    of (movie, person) index pairs.
+    """
+    path = trace_chain(forward, person)
+
+    node = person
+    while backward[node] is not None:
+        movie, parent = backward[node]
+        path.append((movie, parent))
+        node = parent
+    return path
@@ -0,0 +1,139 @@
+"""
+Landmark-based distance oracle.
+
+A handful of well-connected people are chosen as landmarks, and the
+degrees of separation from each landmark to every person are stored in
+one byte per person. By the triangle inequality, for any landmark L
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+so the stored distances give cheap lower and upper bounds for any pair.
+Distances too large for a byte are stored as SATURATED, meaning "at least
+that far", which still gives a lower bound but no upper bound.
+"""
+
+import heapq
+from array import array
+
+# Stored distance for people a landmark cannot reach
+UNREACHABLE = 255
+
+# Stored distance for people SATURATED or more steps from a landmark
+SATURATED = 254
+
+
+class LandmarkOracle():
+    def __init__(self, person_ids, neighbors, degree, k=16):
+        """
+        Picks the `k` people with the highest `degree(person_id)` as
+        landmarks and runs one breadth-first search from each, following
+        `neighbors(person_id)`, which returns (movie_id, person_id) pairs.
+        """
+        self.index = {person_id: i for i, person_id in enumerate(person_ids)}
+        self.landmarks = heapq.nlargest(k, person_ids, key=degree)
+        self.distances = [
+            self.distances_from(landmark, neighbors)
+            for landmark in self.landmarks
+        ]
+
+    def distances_from(self, landmark, neighbors):
+        """
+        Returns the degrees of separation from `landmark` to every person,
+        as an array of bytes indexed like `self.index`.
+        """
+        distances = array("B", [UNREACHABLE]) * len(self.index)
+        distances[self.index[landmark]] = 0
+        layer = [landmark]
+        depth = 0
+        while layer:
+            depth = min(depth + 1, SATURATED)
+            next_layer = []
+            for person_id in layer:
+                for _, neighbor in neighbors(person_id):
+                    i = self.index[neighbor]
+                    if distances[i] == UNREACHABLE:
+                        distances[i] = depth
+                        next_layer.append(neighbor)
+            layer = next_layer
+        return distances
+
+    def add_cast(self, cast, neighbors):
+        """
+        Updates the stored distances after the people in `cast` became
+        co-stars of one another. New co-stars can only bring people closer,
+        so shortened distances are propagated outwards breadth-first.
+        """
+        indices = [self.index[person_id] for person_id in cast]
+        for distances in self.distances:
+            closest = min(distances[i] for i in indices)
+            if closest == UNREACHABLE:
+                continue
+            depth = min(closest + 1, SATURATED)
+            layer = [person_id for person_id, i in zip(cast, indices)
+                     if distances[i] > depth]
+            for person_id in layer:
+                distances[self.index[person_id]] = depth
+            while layer:
+                depth = min(depth + 1, SATURATED)
+                next_layer = []
+                for person_id in layer:
+                    for _, neighbor in neighbors(person_id):
+                        i = self.index[neighbor]
+                        if distances[i] > depth:
+                            distances[i] = depth
+                            next_layer.append(neighbor)
+                layer = next_layer
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two people. `upper` is None if no landmark is within SATURATED
+        steps of both of them, and both are None if a landmark shows they
+        are not connected.
+        """
+        if source == target:
+            return 0, 0
+        s = self.index[source]
+        t = self.index[target]
+        lower = 1
+        upper = None
+        for distances in self.distances:
+            ds = distances[s]
+            dt = distances[t]
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return None, None
+            # A saturated distance is only known to be at least SATURATED
+            if ds == SATURATED and dt == SATURATED:
+                continue
+            lower = max(lower, abs(ds - dt))
+            if ds == SATURATED or dt == SATURATED:
+                continue
+            if upper is None or ds + dt < upper:
+                upper = ds + dt
+        return lower, upper
+
+    def lower_bounds(self, target):
+        """
+        Returns a function giving, for a person's index, a lower bound on
+        their degrees of separation from `target`. People known not to be
+        connected to the target get a bound of UNREACHABLE.
+        """
+        t = self.index[target]
+        columns = [(distances, distances[t]) for distances in self.distances]
+
+        def lower_bound(person):
+            bound = 0
+            for distances, dt in columns:
+                ds = distances[person]
+                if ds == UNREACHABLE or dt == UNREACHABLE:
+                    if ds != dt:
+                        return UNREACHABLE
+                elif ds == SATURATED and dt == SATURATED:
+                    continue
+                elif abs(ds - dt) > bound:
+                    bound = abs(ds - dt)
+            return bound
+
+        return lower_bound
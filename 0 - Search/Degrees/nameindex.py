@@ -0,0 +1,117 @@
+"""
+Index of people's names for prefix and fuzzy lookups.
+
+Lowercased names are kept in one sorted list, alongside the matching
+person IDs. Since every name sharing a prefix sits in one contiguous run
+of that list, the list doubles as an implicit trie: fuzzy lookups walk it
+one character at a time, narrowing runs with binary search and carrying a
+row of the edit distance table, without building any trie nodes.
+"""
+
+from bisect import bisect_left
+
+
+class NameIndex():
+    def __init__(self):
+        self.keys = []
+        self.ids = []
+        self.sorted = True
+
+    def add(self, name, person_id):
+        """
+        Adds a person to the index. Sorting is deferred to the first lookup.
+        """
+        self.keys.append(name.lower())
+        self.ids.append(person_id)
+        self.sorted = False
+
+    def sort(self):
+        if not self.sorted:
+            order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+            self.keys = [self.keys[i] for i in order]
+            self.ids = [self.ids[i] for i in order]
+            self.sorted = True
+
+    def __len__(self):
+        return len(self.keys)
+
+    def exact(self, name):
+        """
+        Returns the IDs of everyone called `name`, ignoring case.
+        """
+        self.sort()
+        name = name.lower()
+        i = bisect_left(self.keys, name)
+        matches = []
+        while i < len(self.keys) and self.keys[i] == name:
+            matches.append(self.ids[i])
+            i += 1
+        return matches
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` (name, person_id) pairs whose name starts
+        with `prefix`, ignoring case, in alphabetical order.
+        """
+        self.sort()
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while (i < len(self.keys) and len(matches) < limit
+               and self.keys[i].startswith(prefix)):
+            matches.append((self.keys[i], self.ids[i]))
+            i += 1
+        return matches
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` (distance, name, person_id) triples for names
+        within `max_distance` edits of `name`, ignoring case, closest first.
+        """
+        self.sort()
+        name = name.lower()
+        matches = []
+        first_row = list(range(len(name) + 1))
+        self.walk(name, max_distance, 0, len(self.keys), 0, first_row, matches)
+        matches.sort()
+        return matches[:limit]
+
+    def walk(self, name, max_distance, lo, hi, depth, row, matches):
+        """
+        Visits the run keys[lo:hi] of names sharing their first `depth`
+        characters, whose edit distance row against `name` is `row`.
+        """
+        keys = self.keys
+        cap = max_distance + 1
+
+        # Names ending here sort first in the run
+        while lo < hi and len(keys[lo]) == depth:
+            if row[-1] <= max_distance:
+                matches.append((row[-1], keys[lo], self.ids[lo]))
+            lo += 1
+
+        # Split the rest of the run by the next character
+        while lo < hi:
+            c = keys[lo][depth]
+            end = bisect_left(keys, keys[lo][:depth] + chr(ord(c) + 1), lo, hi)
+
+            # Cells more than max_distance off the diagonal always exceed
+            # it, so only the band around it is computed; the rest, like
+            # every value past max_distance, is kept at max_distance + 1
+            next_row = [cap] * len(row)
+            if depth < max_distance:
+                next_row[0] = depth + 1
+            for j in range(max(1, depth + 1 - max_distance),
+                           min(len(row), depth + 2 + max_distance)):
+                value = min(
+                    next_row[j - 1] + 1,
+                    row[j] + 1,
+                    row[j - 1] + (name[j - 1] != c),
+                )
+                next_row[j] = value if value < cap else cap
+
+            # Only descend while some alignment can still be close enough
+            if min(next_row) <= max_distance:
+                self.walk(name, max_distance, lo, end, depth + 1,
+                          next_row, matches)
+            lo = end
@@ -0,0 +1,143 @@
+"""
+Binary snapshots of a CompactGraph.
+
+A snapshot is written next to the CSV files after they are first parsed.
+It starts with a magic string and a JSON header recording the size and
+modification time of each CSV file, followed by 8-byte aligned sections:
+the CSR index arrays as raw machine integers and the string tables as
+NUL-separated UTF-8. On load, the index arrays are memory-mapped rather
+than read, so worker processes opening the same snapshot share its pages.
+"""
+
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from graph import INDEX, CompactGraph
+
+MAGIC = b"DEGSNAP1"
+FILENAME = "degrees.snapshot"
+
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars"]
+STRINGS = ["person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years"]
+
+
+def path_for(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stamps(directory):
+    """
+    Returns the size and modification time of each CSV file in `directory`.
+    """
+    stamps = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamps[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def save(graph, directory):
+    """
+    Write a snapshot of `graph`, built from the CSV files in `directory`.
+    """
+    sections = {}
+    chunks = []
+    offset = 0
+    for name in ARRAYS + STRINGS:
+        values = getattr(graph, name)
+        if name in ARRAYS:
+            data = bytes(values)
+        else:
+            data = "\0".join(values).encode("utf-8")
+        sections[name] = [offset, len(data), len(values)]
+        padding = -len(data) % 8
+        chunks.append(data + bytes(padding))
+        offset += len(data) + padding
+
+    header = json.dumps({
+        "sources": source_stamps(directory),
+        "byteorder": sys.byteorder,
+        "itemsize": array(INDEX).itemsize,
+        "sections": sections,
+    }).encode("utf-8")
+    header += b" " * (-len(header) % 8)
+
+    # Write to a temporary file first, so readers never see half a snapshot
+    path = path_for(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temporary, path)
+
+
+def read_sections(mapped, sections, start):
+    """
+    Returns the fields of the graph stored in the sections of a snapshot
+    starting at byte `start`, or None if a section lies past the end of
+    the file or does not hold the number of values recorded for it.
+    """
+    view = memoryview(mapped)
+    fields = {}
+    try:
+        for name in ARRAYS + STRINGS:
+            offset, size, count = sections[name]
+            if offset < 0 or size < 0 or start + offset + size > len(mapped):
+                return None
+            if name in ARRAYS:
+                values = view[start + offset:start + offset + size].cast(INDEX)
+            else:
+                data = mapped[start + offset:start + offset + size]
+                values = data.decode("utf-8").split("\0") if count else []
+                if not count and data:
+                    return None
+            if len(values) != count:
+                return None
+            fields[name] = values
+    except (TypeError, ValueError, KeyError):
+        return None
+    return fields
+
+
+def load(directory):
+    """
+    Returns the CompactGraph stored in the snapshot for `directory`,
+    or None if there is no snapshot, the CSV files changed since, or the
+    snapshot is damaged, as when it was cut short.
+    """
+    try:
+        with open(path_for(directory), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    # Check the snapshot still describes the CSV files on disk
+    try:
+        if mapped[:len(MAGIC)] != MAGIC:
+            mapped.close()
+            return None
+        length = int.from_bytes(mapped[8:16], "little")
+        header = json.loads(mapped[16:16 + length])
+        if (header["sources"] != source_stamps(directory)
+                or header["byteorder"] != sys.byteorder
+                or header["itemsize"] != array(INDEX).itemsize):
+            mapped.close()
+            return None
+    except (OSError, TypeError, ValueError, KeyError):
+        mapped.close()
+        return None
+
+    fields = read_sections(mapped, header["sections"], 16 + length)
+    if fields is None:
+        # No view of the map is left once read_sections has returned
+        mapped.close()
+        return None
+    return CompactGraph(**fields)
@@ -1,3 +1,6 @@
+from collections import OrderedDict, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +10,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier for each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +28,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node)
             return node
 
+    def discard(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +46,94 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node)
             return node
+
+
+class PathCache():
+    """
+    Bounded least-recently-used cache of shortest paths between two people.
+    Paths are stored once per unordered pair of people and reversed
+    when asked for in the opposite direction.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.paths = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source, target):
+        """
+        Returns (True, path) for a cached pair, or (False, None) otherwise.
+        A cached path may be None if the two people are not connected.
+        """
+        key = (source, target) if source <= target else (target, source)
+        if key not in self.paths:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self.paths.move_to_end(key)
+        path = self.paths[key]
+        if path is None:
+            return True, None
+        if key[0] == source:
+            return True, list(path)
+        return True, reverse_path(target, path)
+
+    def put(self, source, target, path):
+        """
+        Caches the path from source to target, evicting the least recently
+        used pair if the cache is full.
+        """
+        if self.capacity <= 0:
+            return
+        if source <= target:
+            key = (source, target)
+        else:
+            key = (target, source)
+            path = reverse_path(source, path)
+        self.paths[key] = None if path is None else tuple(path)
+        self.paths.move_to_end(key)
+        while len(self.paths) > self.capacity:
+            self.paths.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.paths.clear()
+
+    def invalidate(self, predicate):
+        """
+        Drops every cached pair for which predicate(source, target, path)
+        is True, with the path oriented from source to target.
+        Returns the number of pairs dropped.
+        """
+        stale = [key for key, path in self.paths.items()
+                 if predicate(key[0], key[1], path)]
+        for key in stale:
+            del self.paths[key]
+        return len(stale)
+
+    def info(self):
+        """
+        Returns the cache counters as a dictionary.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.paths),
+            "capacity": self.capacity,
+        }
+
+
+def reverse_path(source, path):
+    """
+    Given a list of (movie_id, person_id) pairs leading from `source`,
+    returns the pairs leading back from its last person to `source`.
+    """
+    if path is None:
+        return None
+    people = [source] + [person for _, person in path]
+    return [(path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)]
@@ -0,0 +1,203 @@
+"""
+Tic Tac Toe engine on bitboards
+
+A state is a pair of 9-bit integers (x, o): bit 3 * i + j of each mask is
+set when X (respectively O) has played cell (i, j). Everything that only
+depends on which cells are filled is precomputed for all 512 masks, so
+player, actions, result and winner are constant-time lookups.
+"""
+
+from tictactoe import X, O, EMPTY
+
+FULL = 0b111111111
+
+# The eight winning lines, as masks
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+]
+
+# For every mask of cells, whether it contains a full line
+WINNING = [any(mask & line == line for line in WIN_MASKS)
+           for mask in range(FULL + 1)]
+
+# For every mask of filled cells, the set of empty cells as (i, j)
+ACTIONS = [frozenset(divmod(bit, 3) for bit in range(9)
+                     if not filled >> bit & 1)
+           for filled in range(FULL + 1)]
+
+# For every mask, the number of cells set
+COUNTS = [bin(mask).count("1") for mask in range(FULL + 1)]
+
+# Maps states to the (value, move) pair found by minimax
+transposition_table = {}
+
+# Number of states visited by the search
+search_stats = {"nodes": 0}
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def player(state):
+    """
+    Returns player who has the next turn on a board.
+    """
+    if terminal(state):
+        return None
+    x, o = state
+    return X if COUNTS[x] == COUNTS[o] else O
+
+
+def actions(state):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    x, o = state
+    return ACTIONS[x | o]
+
+
+def result(state, action):
+    """
+    Returns the state that results from making move (i, j) on the board.
+    """
+    x, o = state
+    i, j = action
+    bit = 1 << (3 * i + j)
+    if (x | o) & bit or terminal(state):
+        raise ValueError("The action is not allowed")
+    if COUNTS[x] == COUNTS[o]:
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = state
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = state
+    return WINNING[x] or WINNING[o] or (x | o) == FULL
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = state
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def from_board(board):
+    """
+    Returns the state for a list-of-lists board, as used by tictactoe.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(state):
+    """
+    Returns the list-of-lists board for a state.
+    """
+    x, o = state
+    board = [[EMPTY, EMPTY, EMPTY] for _ in range(3)]
+    for bit in range(9):
+        i, j = divmod(bit, 3)
+        if x >> bit & 1:
+            board[i][j] = X
+        elif o >> bit & 1:
+            board[i][j] = O
+    return board
+
+
+def value(state):
+    """
+    Returns (value, move) for the player to move, searching the full tree
+    below the state. Results are kept in the transposition table.
+    """
+    if state in transposition_table:
+        return transposition_table[state]
+    search_stats["nodes"] += 1
+
+    x, o = state
+    filled = x | o
+    if WINNING[x]:
+        best, move = 1, None
+    elif WINNING[o]:
+        best, move = -1, None
+    elif filled == FULL:
+        best, move = 0, None
+    else:
+        best, move = search(x, o, filled)
+
+    transposition_table[state] = (best, move)
+    return best, move
+
+
+def search(x, o, filled):
+    """
+    Returns (value, move) for a non-terminal state by trying every move.
+    """
+    # X maximizes the utility, O minimizes it
+    maximizing = COUNTS[x] == COUNTS[o]
+    best = None
+    move = None
+    for bit in range(9):
+        if filled >> bit & 1:
+            continue
+        if maximizing:
+            child = (x | 1 << bit, o)
+        else:
+            child = (x, o | 1 << bit)
+        v, _ = value(child)
+        if best is None or (v > best if maximizing else v < best):
+            best = v
+            move = divmod(bit, 3)
+            # Nothing beats a win
+            if best == (1 if maximizing else -1):
+                break
+    return best, move
+
+
+def minimax(state):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(state):
+        return None
+    return value(state)[1]
+
+
+def minimax_board(board):
+    """
+    Returns the optimal action for a list-of-lists board,
+    so the bitboard engine can stand in for tictactoe.minimax.
+    """
+    return minimax(from_board(board))
@@ -0,0 +1,425 @@
+"""
+m,n,k-game engine
+
+Tic Tac Toe generalized to a board of m rows and n columns, won by the
+first player with k marks in a row, column or diagonal: 3,3,3 is Tic Tac
+Toe and 15,15,5 is Gomoku. Boards are lists of lists of X, O and EMPTY,
+as in tictactoe.py.
+
+Full-depth minimax is hopeless past 3x3, so the AI runs iterative
+deepening alpha-beta search within a time budget, scoring the positions
+where it stops by the lines each player could still complete. Every
+possible line of k cells is numbered up front, and the search keeps a
+count of each player's marks in every line, updated only around the cell
+just played. Those counts detect wins and keep the score up to date
+without ever rescanning the board.
+"""
+
+import random
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Score of a won position, above any score of an unfinished one
+WIN = 10 ** 12
+
+# Kinds of values stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Positions between checks of the clock
+CLOCK_INTERVAL = 1024
+
+# Transposition table size above which it is emptied
+TABLE_LIMIT = 1000000
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+    def __init__(self, m=3, n=3, k=3, radius=None):
+        """
+        Sets up a board of `m` rows and `n` columns, won with `k` in a row.
+        If `radius` is given, the AI only considers empty cells within that
+        many rows and columns of a mark, which is how large boards stay
+        searchable.
+        """
+        if k > max(m, n):
+            raise ValueError("k is larger than the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.radius = radius
+        self.size = m * n
+
+        # Every line of k cells, as a tuple of cell numbers i * n + j
+        self.lines = []
+        for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            for i in range(m):
+                for j in range(n):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(tuple(
+                            (i + di * step) * n + j + dj * step
+                            for step in range(k)
+                        ))
+
+        # For every cell, the lines going through it
+        self.lines_of = [[] for _ in range(self.size)]
+        for line, cells in enumerate(self.lines):
+            for cell in cells:
+                self.lines_of[cell].append(line)
+
+        # Score of a line holding `c` marks of one player and none of the
+        # other. Each extra mark is worth far more than the one before
+        self.weights = [0] + [8 ** c for c in range(1, k)] + [WIN]
+
+        # Random keys for Zobrist hashing: the hash of a position is the
+        # XOR of the keys of its marks, so it changes in O(1) per move
+        rng = random.Random(0)
+        self.keys = [[rng.getrandbits(64) for _ in range(self.size)]
+                     for _ in range(2)]
+
+        self.table = {}
+        self.search_stats = {"nodes": 0, "depth": 0, "value": 0, "time": 0.0}
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        if self.terminal(board):
+            return None
+        count_X = sum(row.count(X) for row in board)
+        count_O = sum(row.count(O) for row in board)
+        return X if count_X == count_O else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] is EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) \
+                or board[i][j] is not EMPTY or self.terminal(board):
+            raise ValueError("The action is not allowed")
+        new_board = [list(row) for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def wins(self, board, action):
+        """
+        Returns True if the mark on cell `action` completes a line,
+        only looking at the lines through that cell.
+        """
+        i, j = action
+        mark = board[i][j]
+        if mark is EMPTY:
+            return False
+        for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            count = 1
+            for sign in (1, -1):
+                y = i + sign * di
+                x = j + sign * dj
+                while 0 <= y < self.m and 0 <= x < self.n \
+                        and board[y][x] == mark:
+                    count += 1
+                    y += sign * di
+                    x += sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for i in range(self.m):
+            for j in range(self.n):
+                if board[i][j] is not EMPTY and self.wins(board, (i, j)):
+                    return board[i][j]
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        if self.winner(board) is not None:
+            return True
+        return all(cell is not EMPTY for row in board for cell in row)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        win_player = self.winner(board)
+        if win_player == X:
+            return 1
+        elif win_player == O:
+            return -1
+        return 0
+
+    def minimax(self, board, time_limit=1.0, max_depth=None):
+        """
+        Returns the best action found for the current player on the board,
+        searching one move deeper at a time until `time_limit` seconds
+        have passed, the game is solved or `max_depth` moves are reached.
+        """
+        if self.terminal(board):
+            return None
+        if len(self.table) > TABLE_LIMIT:
+            self.table.clear()
+        search = Search(self, board, time.perf_counter() + time_limit)
+        move = search.run(max_depth)
+        self.search_stats = search.stats()
+        return divmod(move, self.n)
+
+
+class Search():
+    """
+    State of one iterative deepening search: the board as a flat list
+    of cells, each player's count of marks in every line, the score and
+    the hash of the position, all updated in place as moves are played
+    and undone.
+    """
+    def __init__(self, game, board, deadline):
+        self.game = game
+        self.deadline = deadline
+        self.started = time.perf_counter()
+        self.cells = [EMPTY] * game.size
+        self.counts = [[0] * len(game.lines), [0] * len(game.lines)]
+        # Score from X's point of view
+        self.score = 0
+        self.hash = 0
+        self.filled = 0
+        self.nodes = 0
+        self.depth = 0
+        self.value = 0
+        self.best = None
+
+        # Replay the marks on the board; turns alternate, starting with X
+        for mark in (X, O):
+            for i, row in enumerate(board):
+                for j, cell in enumerate(row):
+                    if cell == mark:
+                        self.side = 0 if mark == X else 1
+                        self.play(i * game.n + j)
+        count_X = sum(row.count(X) for row in board)
+        count_O = sum(row.count(O) for row in board)
+        self.side = 0 if count_X == count_O else 1
+
+    def line_score(self, own, other):
+        """
+        Returns the score of a line for the player owning `own` marks in it.
+        """
+        if other == 0:
+            return self.game.weights[own]
+        if own == 0:
+            return -self.game.weights[other]
+        return 0
+
+    def play(self, cell):
+        """
+        Puts the mark of the player to move on `cell` and passes the turn.
+        Returns True if the mark completes a line.
+        """
+        side = self.side
+        own = self.counts[side]
+        other = self.counts[1 - side]
+        sign = 1 if side == 0 else -1
+        won = False
+        for line in self.game.lines_of[cell]:
+            before = self.line_score(own[line], other[line])
+            own[line] += 1
+            self.score += sign * (self.line_score(own[line], other[line])
+                                  - before)
+            if own[line] == self.game.k:
+                won = True
+        self.cells[cell] = X if side == 0 else O
+        self.hash ^= self.game.keys[side][cell]
+        self.filled += 1
+        self.side = 1 - side
+        return won
+
+    def undo(self, cell):
+        """
+        Takes back the mark on `cell`, played by the previous player.
+        """
+        side = 1 - self.side
+        own = self.counts[side]
+        other = self.counts[1 - side]
+        sign = 1 if side == 0 else -1
+        for line in self.game.lines_of[cell]:
+            before = self.line_score(own[line], other[line])
+            own[line] -= 1
+            self.score += sign * (self.line_score(own[line], other[line])
+                                  - before)
+        self.cells[cell] = EMPTY
+        self.hash ^= self.game.keys[side][cell]
+        self.filled -= 1
+        self.side = side
+
+    def evaluate(self):
+        """
+        Returns the score of the position for the player to move.
+        """
+        return self.score if self.side == 0 else -self.score
+
+    def candidates(self):
+        """
+        Returns the empty cells worth trying, most promising first: cells
+        extending the mover's lines or blocking the opponent's rank highest.
+        """
+        game = self.game
+        cells = self.cells
+        if game.radius is None or self.filled == 0:
+            empty = [cell for cell in range(game.size) if cells[cell] is EMPTY]
+            if self.filled == 0 and game.radius is not None:
+                # Start in the middle of an empty board
+                empty = [(game.m // 2) * game.n + game.n // 2]
+        else:
+            near = set()
+            r = game.radius
+            for cell in range(game.size):
+                if cells[cell] is EMPTY:
+                    continue
+                i, j = divmod(cell, game.n)
+                for y in range(max(0, i - r), min(game.m, i + r + 1)):
+                    for x in range(max(0, j - r), min(game.n, j + r + 1)):
+                        if cells[y * game.n + x] is EMPTY:
+                            near.add(y * game.n + x)
+            empty = list(near)
+
+        own = self.counts[self.side]
+        other = self.counts[1 - self.side]
+        weights = game.weights
+
+        def priority(cell):
+            total = 0
+            for line in game.lines_of[cell]:
+                if other[line] == 0:
+                    total += weights[own[line] + 1]
+                if own[line] == 0:
+                    total += weights[other[line] + 1]
+            return total
+
+        empty.sort(key=priority, reverse=True)
+        return empty
+
+    def run(self, max_depth=None):
+        """
+        Searches one move deeper at a time and returns the best cell found
+        by the deepest search that finished in time.
+        """
+        empty = self.game.size - self.filled
+        limit = empty if max_depth is None else min(max_depth, empty)
+        for depth in range(1, limit + 1):
+            try:
+                value = self.negamax(depth, -WIN - 1, WIN + 1, 0)
+            except Timeout:
+                break
+            self.depth = depth
+            self.value = value
+            self.best = self.root_move
+            # Stop once the search has found a forced win or loss
+            if abs(value) > WIN - self.game.size:
+                break
+        return self.best
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Returns the value of the position for the player to move, searching
+        `depth` moves ahead. Values outside (alpha, beta) are only bounds.
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and self.best is not None \
+                and time.perf_counter() > self.deadline:
+            raise Timeout
+        if depth == 0:
+            return self.evaluate()
+
+        # Try the best move of an earlier search of this position first
+        table = self.game.table
+        entry = table.get(self.hash)
+        table_move = None
+        if entry is not None:
+            entry_depth, value, flag, table_move = entry
+            # Wins are stored as plies from the position, not from the root
+            if value > WIN - self.game.size:
+                value -= ply
+            elif value < -WIN + self.game.size:
+                value += ply
+            if ply > 0 and entry_depth >= depth and (
+                    flag == EXACT
+                    or (flag == LOWER and value >= beta)
+                    or (flag == UPPER and value <= alpha)):
+                return value
+
+        moves = self.candidates()
+        if not moves:
+            # Full board, and nobody won
+            return 0
+        if table_move in moves:
+            moves.remove(table_move)
+            moves.insert(0, table_move)
+
+        original_alpha = alpha
+        best = -WIN - 1
+        best_move = moves[0]
+        for cell in moves:
+            if self.play(cell):
+                value = WIN - ply - 1
+            elif self.filled == self.game.size:
+                value = 0
+            else:
+                value = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            self.undo(cell)
+            if value > best:
+                best = value
+                best_move = cell
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+
+        if ply == 0:
+            self.root_move = best_move
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        stored = best
+        if best > WIN - self.game.size:
+            stored += ply
+        elif best < -WIN + self.game.size:
+            stored -= ply
+        table[self.hash] = (depth, stored, flag, best_move)
+        return best
+
+    def stats(self):
+        """
+        Returns the search counters as a dictionary.
+        """
+        return {
+            "nodes": self.nodes,
+            "depth": self.depth,
+            "value": self.value,
+            "time": time.perf_counter() - self.started,
+        }
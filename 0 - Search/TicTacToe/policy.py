@@ -0,0 +1,84 @@
+"""
+Opening book generator for Tic Tac Toe
+
+Solves every position reachable from the empty board once, up to
+rotations and reflections, and writes the best move and value of each to
+the file tictactoe.py loads on import. With the book in place, minimax is
+a single table lookup for every position of every game.
+
+Usage: python policy.py [path]
+"""
+
+import sys
+import time
+
+import tictactoe as ttt
+
+
+def positions():
+    """
+    Returns a dictionary mapping the canonical code of every reachable,
+    non-terminal position to one board in that position.
+    """
+    boards = {}
+    layer = [ttt.initial_state()]
+    while layer:
+        next_layer = []
+        for board in layer:
+            code, _ = ttt.canonical(board)
+            if code in boards or ttt.terminal(board):
+                continue
+            boards[code] = board
+            for action in ttt.actions(board):
+                next_layer.append(ttt.result(board, action))
+        layer = next_layer
+    return boards
+
+
+def solve(boards):
+    """
+    Returns a list of (code, cell, value) entries, sorted by code, giving the
+    best move of each board as a cell number in the canonical orientation.
+    """
+    entries = []
+    for code, board in boards.items():
+        if ttt.player(board) == ttt.X:
+            value, move = ttt.max_value(board)
+        else:
+            value, move = ttt.min_value(board)
+        _, symmetry = ttt.canonical(board)
+        i, j = ttt.transform(move, symmetry)
+        entries.append((code, 3 * i + j, value))
+    entries.sort()
+    return entries
+
+
+def write(entries, path=ttt.POLICY_FILE):
+    """
+    Writes the entries to `path` in the format read by ttt.load_policy.
+    """
+    with open(path, "wb") as f:
+        f.write(ttt.POLICY_MAGIC)
+        for entry in entries:
+            f.write(ttt.POLICY_ENTRY.pack(*entry))
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python policy.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else ttt.POLICY_FILE
+
+    start = time.perf_counter()
+    entries = solve(positions())
+    write(entries, path)
+    print(f"Solved {len(entries)} positions "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"Wrote {path}")
+
+    start = time.perf_counter()
+    ttt.load_policy(path)
+    print(f"Loads in {(time.perf_counter() - start) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
 import tictactoe as ttt
 
@@ -19,12 +20,37 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The AI searches in a background thread, so the window keeps drawing and
+# handling events meanwhile. A single worker means searches never overlap,
+# since minimax shares its transposition table between calls
+executor = ThreadPoolExecutor(max_workers=1)
+ai_future = None
+ai_started = 0
+
+# Seconds the AI waits at least before playing, so its move can be seen
+ai_delay = 0.5
+
+
+def cancel_ai():
+    """
+    Stops the search in progress, if any, and drops its result. The search
+    checks for the abort at every position, so this returns at once.
+    """
+    global ai_future
+    if ai_future is not None:
+        ttt.abort_search.set()
+        wait([ai_future])
+        ttt.abort_search.clear()
+        ai_future = None
+
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai()
+            executor.shutdown()
             sys.exit()
 
     screen.fill(black)
@@ -108,15 +134,16 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, starting a search if none is running
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if ai_future is None:
+                ai_future = executor.submit(ttt.minimax, board)
+                ai_started = time.monotonic()
+            elif ai_future.done() \
+                    and time.monotonic() - ai_started >= ai_delay:
+                move = ai_future.result()
+                ai_future = None
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,20 +154,21 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+        # Offer a new game at any time, even while the computer is thinking
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        label = "Play Again" if game_over else "New Game"
+        again = mediumFont.render(label, True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        click, _, _ = pygame.mouse.get_pressed()
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                time.sleep(0.2)
+                cancel_ai()
+                user = None
+                board = ttt.initial_state()
 
     pygame.display.flip()
@@ -0,0 +1,156 @@
+"""
+Headless self-play for Tic Tac Toe
+
+Plays games between two agents without the pygame interface, spread
+over worker processes, and reports the outcome of the games along with
+the time each agent took per move and the positions it searched.
+
+Usage: python selfplay.py X_AGENT O_AGENT [-n GAMES] [--workers N]
+
+Agents:
+    minimax   alpha-beta search from scratch for every move
+    cached    alpha-beta search sharing its transposition table across
+              moves and games, answered by the opening book if present
+    bitboard  memoized full search on bitboards
+    random    a random legal move
+"""
+
+import argparse
+import multiprocessing
+import random
+import time
+
+import bitboard
+import tictactoe as ttt
+
+AGENTS = ["minimax", "cached", "bitboard", "random"]
+
+
+def fresh_minimax(board):
+    """
+    Returns ttt.minimax(board) searched from scratch, without the opening
+    book and with a transposition table and killer moves of its own, so
+    the state the cached agent keeps between moves is left untouched.
+    """
+    saved = (ttt.transposition_table, ttt.table_stats, ttt.killer_moves,
+             dict(ttt.search_options))
+    ttt.transposition_table = {}
+    ttt.table_stats = {"hits": 0, "misses": 0}
+    ttt.killer_moves = {}
+    ttt.search_options["policy"] = False
+    try:
+        return ttt.minimax(board)
+    finally:
+        (ttt.transposition_table, ttt.table_stats, ttt.killer_moves,
+         options) = saved
+        ttt.search_options.update(options)
+
+
+def choose_move(agent, board, rng):
+    """
+    Returns (move, nodes): the move `agent` plays on the board and the
+    number of positions it searched to find it.
+    """
+    if agent == "minimax":
+        move = fresh_minimax(board)
+        return move, ttt.search_stats["nodes"]
+    if agent == "cached":
+        ttt.search_options["policy"] = True
+        move = ttt.minimax(board)
+        return move, ttt.search_stats["nodes"]
+    if agent == "bitboard":
+        before = bitboard.search_stats["nodes"]
+        move = bitboard.minimax_board(board)
+        return move, bitboard.search_stats["nodes"] - before
+    if agent == "random":
+        return rng.choice(sorted(ttt.actions(board))), 0
+    raise ValueError(f"unknown agent {agent}")
+
+
+def play_game(game):
+    """
+    Plays one game, given as (x_agent, o_agent, seed), and returns a
+    dictionary with the winner and each agent's per-move times and nodes.
+    """
+    x_agent, o_agent, seed = game
+    rng = random.Random(seed)
+    agents = {ttt.X: x_agent, ttt.O: o_agent}
+    times = {ttt.X: [], ttt.O: []}
+    nodes = {ttt.X: [], ttt.O: []}
+
+    board = ttt.initial_state()
+    while not ttt.terminal(board):
+        player = ttt.player(board)
+        start = time.perf_counter()
+        move, searched = choose_move(agents[player], board, rng)
+        times[player].append(time.perf_counter() - start)
+        nodes[player].append(searched)
+        board = ttt.result(board, move)
+
+    return {"winner": ttt.winner(board), "times": times, "nodes": nodes}
+
+
+def play_games(x_agent, o_agent, games, processes=1, seed=0):
+    """
+    Returns the results of `games` games between the agents,
+    played by a pool of `processes` worker processes.
+    """
+    jobs = [(x_agent, o_agent, seed + i) for i in range(games)]
+    if processes <= 1:
+        return [play_game(job) for job in jobs]
+    chunksize = max(1, games // (processes * 8))
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(play_game, jobs, chunksize)
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of sorted `values`, by nearest rank.
+    """
+    if not values:
+        return 0.0
+    rank = max(1, -(-p * len(values) // 100))
+    return values[int(rank) - 1]
+
+
+def report(x_agent, o_agent, results, elapsed):
+    games = len(results)
+    print(f"{games} games, {x_agent} (X) vs {o_agent} (O), "
+          f"in {elapsed:.2f}s")
+    for label, outcome in [("X wins", ttt.X), ("O wins", ttt.O),
+                           ("Draws", None)]:
+        count = sum(result["winner"] == outcome for result in results)
+        print(f"  {label:7} {count:6} ({100 * count / games:.1f}%)")
+
+    for player, agent in [(ttt.X, x_agent), (ttt.O, o_agent)]:
+        times = sorted(t * 1000 for result in results
+                       for t in result["times"][player])
+        nodes = [n for result in results for n in result["nodes"][player]]
+        if not times:
+            continue
+        print(f"{player} ({agent}): {len(times)} moves, "
+              f"{sum(nodes) / len(nodes):.1f} nodes per move")
+        print("  ms per move: " + ", ".join(
+            f"p{p} {percentile(times, p):.3f}" for p in (50, 90, 99)
+        ) + f", max {times[-1]:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("x_agent", choices=AGENTS)
+    parser.add_argument("o_agent", choices=AGENTS)
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="play games in N processes")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game's random moves")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = play_games(args.x_agent, args.o_agent, args.games,
+                         args.workers, args.seed)
+    report(args.x_agent, args.o_agent, results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
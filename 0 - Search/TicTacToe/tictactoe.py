@@ -4,11 +4,87 @@ Tic Tac Toe Player
 
 import math
 import copy
+import os
+import struct
+import threading
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# The 8 symmetries of the board (rotations and reflections), each mapping
+# a cell (i, j) to the cell it is moved to
+SYMMETRIES = [
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i),
+]
+
+# For each symmetry, the index of the symmetry undoing it
+INVERSES = [0, 3, 2, 1, 4, 5, 6, 7]
+
+# Moves in the order the search tries them: center, then corners, then edges.
+# The center and corners lie on more winning lines, so they tend to settle
+# a position, and cut off the remaining moves, sooner
+MOVE_ORDER = [
+    (1, 1),
+    (0, 0), (0, 2), (2, 0), (2, 2),
+    (0, 1), (1, 0), (1, 2), (2, 1),
+]
+MOVE_RANK = {action: rank for rank, action in enumerate(MOVE_ORDER)}
+
+# Switches for the parts of the search, to compare their effect
+search_options = {"ordering": True, "killers": True, "table": True,
+                  "policy": True}
+
+# For every number of moves played, the last move that caused a cutoff.
+# A move refuting one position often refutes its siblings too, so it is
+# tried first in positions at the same depth
+killer_moves = {}
+
+# Kinds of values stored in the transposition table: the exact value of
+# the position, or only a lower or upper bound on it after a cutoff
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Maps canonical board codes to the (value, move, flag) triple found by
+# max_value/min_value, with the move given in the canonical orientation.
+# Shared by every call, so positions are only ever searched once per process
+transposition_table = {}
+
+# Number of transposition table lookups that found / did not find a board
+table_stats = {"hits": 0, "misses": 0}
+
+# Positions visited and cutoffs made by the last call to minimax
+search_stats = {"nodes": 0, "cutoffs": 0}
+
+# Opening book written by policy.py: a magic string, then one entry per
+# position in which someone can move, reachable from the empty board, up to
+# symmetry. Each entry packs the canonical code, the best move as a cell
+# number 3 * i + j in the canonical orientation, and the value
+POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "policy.bin")
+POLICY_MAGIC = b"TTTPOLv1"
+POLICY_ENTRY = struct.Struct("<HBb")
+
+# Maps canonical board codes to (value, move) pairs read from POLICY_FILE
+policy_table = {}
+
+# Set from another thread to stop the call to minimax in progress, which
+# then raises Aborted, and cleared once it has. Only finished positions are
+# ever stored in the transposition table, so stopping a search leaves it valid
+abort_search = threading.Event()
+
+
+class Aborted(Exception):
+    pass
+
 
 def initial_state():
     """
@@ -84,7 +160,7 @@ def winner(board):
         win_player = board[0][0]
         return win_player
     if board[0][2] == board[1][1] == board[2][0]\
-            and board[0][0] is not None:
+            and board[0][2] is not None:
         win_player = board[0][2]
         return win_player
 
@@ -114,52 +190,225 @@ def utility(board):
         return 0
 
 
-def min_value(board):
+def encode(board):
+    """
+    Returns an integer uniquely identifying the board,
+    reading its cells as the digits of a base-3 number.
+    """
+    code = 0
+    for row in board:
+        for cell in row:
+            code = code * 3 + (0 if cell == EMPTY else 1 if cell == X else 2)
+    return code
+
+
+def canonical(board):
+    """
+    Returns (code, symmetry): the smallest code of the board among its
+    8 rotations and reflections, and the index of the symmetry giving it.
+    """
+    best = None
+    for k, symmetry in enumerate(SYMMETRIES):
+        code = 0
+        for i in range(3):
+            for j in range(3):
+                cell = board[i][j]
+                if cell != EMPTY:
+                    ti, tj = symmetry(i, j)
+                    code += (1 if cell == X else 2) * 3 ** (8 - 3 * ti - tj)
+        if best is None or code < best[0]:
+            best = (code, k)
+    return best
+
+
+def transform(action, symmetry):
+    """
+    Returns the cell an action (i, j) is moved to by a symmetry.
+    """
+    if action is None:
+        return None
+    return SYMMETRIES[symmetry](*action)
+
+
+def cache_info():
+    """
+    Returns transposition table statistics.
+    """
+    hits = table_stats["hits"]
+    misses = table_stats["misses"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "size": len(transposition_table),
+    }
+
+
+def clear_cache():
+    """
+    Empties the transposition table and resets its statistics.
+    """
+    transposition_table.clear()
+    table_stats["hits"] = 0
+    table_stats["misses"] = 0
+
+
+def lookup(board, alpha, beta, search):
+    """
+    Returns the (value, move) pair for a board from the transposition
+    table, computing it with `search` and storing it on a miss.
+    Boards are stored in their canonical orientation, so all rotations
+    and reflections of a position share one entry. A bound stored after
+    a cutoff is only used if it settles the position for this window.
+    """
+    search_stats["nodes"] += 1
+    if abort_search.is_set():
+        raise Aborted
+    if not search_options["table"]:
+        return search(board, alpha, beta)
+
+    code, symmetry = canonical(board)
+    if code in transposition_table:
+        value, move, flag = transposition_table[code]
+        if (flag == EXACT
+                or (flag == LOWER and value >= beta)
+                or (flag == UPPER and value <= alpha)):
+            table_stats["hits"] += 1
+            return value, transform(move, INVERSES[symmetry])
+    table_stats["misses"] += 1
+
+    value, move = search(board, alpha, beta)
+    if value <= alpha:
+        flag = UPPER
+    elif value >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    transposition_table[code] = (value, transform(move, symmetry), flag)
+    return value, move
+
+
+def ordered_actions(board):
+    """
+    Returns the actions available on the board in the order to try them:
+    the killer move for this depth first, then center, corners and edges.
+    """
+    moves = actions(board)
+    if search_options["ordering"]:
+        moves = sorted(moves, key=MOVE_RANK.get)
+    else:
+        moves = list(moves)
+    if search_options["killers"]:
+        killer = killer_moves.get(9 - len(moves))
+        if killer in moves:
+            moves.remove(killer)
+            moves.insert(0, killer)
+    return moves
+
+
+def cutoff(board, action):
+    """
+    Records that `action` made the rest of the moves on the board irrelevant.
+    """
+    search_stats["cutoffs"] += 1
+    killer_moves[sum(cell != EMPTY for row in board for cell in row)] = action
+
+
+# Utilities never leave [-1, 1], so searching with that window rather than
+# an infinite one lets a forced win or loss end the search at once
+def min_value(board, alpha=-1, beta=1):
+    return lookup(board, alpha, beta, search_min)
+
+
+def max_value(board, alpha=-1, beta=1):
+    return lookup(board, alpha, beta, search_max)
+
+
+def search_min(board, alpha, beta):
     if terminal(board):
         return utility(board), None
 
     # Initialize maximum value for v. Then cycle
     v = float("inf")
     move = None
-    for action in actions(board):
-        test, act = max_value(result(board, action))
+    for action in ordered_actions(board):
+        test, act = max_value(result(board, action), alpha, beta)
         # If current value is lower, choose that action
         if test < v:
             v = test
             move = action
-            if v == -1:
-                return v, move
+        # X already has a better option elsewhere, so stop here
+        if v <= alpha:
+            cutoff(board, action)
+            return v, move
+        beta = min(beta, v)
     return v, move
 
 
-def max_value(board):
+def search_max(board, alpha, beta):
     if terminal(board):
         return utility(board), None
 
     # initialize minimum value for v. Then cycle
     v = float("-inf")
     move = None
-    for action in actions(board):
-        test, act = min_value(result(board, action))
+    for action in ordered_actions(board):
+        test, act = min_value(result(board, action), alpha, beta)
         # If current value is higher, choose that action
         if test > v:
             v = test
             move = action
-            if v == 1:
-                return v, move
+        # O already has a better option elsewhere, so stop here
+        if v >= beta:
+            cutoff(board, action)
+            return v, move
+        alpha = max(alpha, v)
     return v, move
 
 
+def load_policy(path=POLICY_FILE):
+    """
+    Fills policy_table from an opening book written by policy.py.
+    Returns False, leaving the table empty, if there is no valid book.
+    """
+    policy_table.clear()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return False
+    body = data[len(POLICY_MAGIC):]
+    if not data.startswith(POLICY_MAGIC) or len(body) % POLICY_ENTRY.size:
+        return False
+    for code, cell, value in POLICY_ENTRY.iter_unpack(body):
+        policy_table[code] = (value, divmod(cell, 3))
+    return True
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+    The number of positions visited is left in search_stats.
+    Raises Aborted if abort_search is set before the search ends.
     """
+    search_stats["nodes"] = 0
+    search_stats["cutoffs"] = 0
     if terminal(board):
         return None
+
+    # With an opening book, every reachable position is a single lookup
+    if policy_table and search_options["policy"]:
+        code, symmetry = canonical(board)
+        if code in policy_table:
+            value, move = policy_table[code]
+            return transform(move, INVERSES[symmetry])
+
+    if player(board) == X:
+        value, move = max_value(board)
+        return move
     else:
-        if player(board) == X:
-            value, move = max_value(board)
-            return move
-        else:
-            value, move = min_value(board)
-            return move
+        value, move = min_value(board)
+        return move
+
+
+load_policy()
@@ -1,19 +1,46 @@
 import itertools
+import multiprocessing
+import os
+import weakref
+
+import sat
 
 
 class Sentence():
+    # Interned sentences are frozen, and keep their hash and symbols
+    __slots__ = ("frozen", "cached_hash", "cached_symbols", "__weakref__")
+
+    def __init__(self):
+        self.frozen = False
+        self.cached_hash = None
+        self.cached_symbols = None
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave symbols
+        out. Returns None if the value depends on the symbols left out.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return frozenset()
+
+    def operands(self):
+        """Returns the sentences the logical sentence is built from."""
+        return ()
+
+    def __reduce__(self):
+        # Pickle by rebuilding, so copies in other processes hash afresh
+        return (type(self), self.operands())
 
     @classmethod
     def validate(cls, sentence):
@@ -43,34 +70,50 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
+        Sentence.__init__(self)
         self.name = name
+        # Symbols never change, so they count as interned already
+        self.frozen = True
+        self.cached_hash = hash(("symbol", name))
+        self.cached_symbols = frozenset([name])
 
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self.cached_hash
 
     def __repr__(self):
         return self.name
 
+    def __reduce__(self):
+        return (Symbol, (self.name,))
+
     def evaluate(self, model):
         try:
             return bool(model[self.name])
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return self.cached_symbols
 
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
+        Sentence.__init__(self)
         Sentence.validate(operand)
         self.operand = operand
 
@@ -78,6 +121,8 @@ class Not(Sentence):
         return isinstance(other, Not) and self.operand == other.operand
 
     def __hash__(self):
+        if self.cached_hash is not None:
+            return self.cached_hash
         return hash(("not", hash(self.operand)))
 
     def __repr__(self):
@@ -86,23 +131,36 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
         return self.operand.symbols()
 
+    def operands(self):
+        return (self.operand,)
+
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
+        Sentence.__init__(self)
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return (isinstance(other, And)
+                and self.operands() == other.operands())
 
     def __hash__(self):
+        if self.cached_hash is not None:
+            return self.cached_hash
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
         )
@@ -114,12 +172,24 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self.frozen:
+            raise TypeError("interned sentences cannot be changed")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -127,19 +197,31 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        if self.cached_symbols is not None:
+            return self.cached_symbols
+        return frozenset().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts])
+
+    def operands(self):
+        return tuple(self.conjuncts)
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
+        Sentence.__init__(self)
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return (isinstance(other, Or)
+                and self.operands() == other.operands())
 
     def __hash__(self):
+        if self.cached_hash is not None:
+            return self.cached_hash
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
@@ -151,6 +233,16 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -158,11 +250,20 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        if self.cached_symbols is not None:
+            return self.cached_symbols
+        return frozenset().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts])
+
+    def operands(self):
+        return tuple(self.disjuncts)
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
+        Sentence.__init__(self)
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
         self.antecedent = antecedent
@@ -174,6 +275,8 @@ class Implication(Sentence):
                 and self.consequent == other.consequent)
 
     def __hash__(self):
+        if self.cached_hash is not None:
+            return self.cached_hash
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
 
     def __repr__(self):
@@ -183,17 +286,36 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        if self.cached_symbols is not None:
+            return self.cached_symbols
+        return self.antecedent.symbols() | self.consequent.symbols()
+
+    def operands(self):
+        return (self.antecedent, self.consequent)
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
+        Sentence.__init__(self)
         Sentence.validate(left)
         Sentence.validate(right)
         self.left = left
@@ -205,6 +327,8 @@ class Biconditional(Sentence):
                 and self.right == other.right)
 
     def __hash__(self):
+        if self.cached_hash is not None:
+            return self.cached_hash
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
     def __repr__(self):
@@ -216,48 +340,607 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+        if self.cached_symbols is not None:
+            return self.cached_symbols
+        return self.left.symbols() | self.right.symbols()
+
+    def operands(self):
+        return (self.left, self.right)
+
+
+# Interned sentences, by type and operands. An entry goes away along with
+# the last reference to its sentence
+interned = weakref.WeakValueDictionary()
+
+
+def intern(sentence):
+    """
+    Returns the interned copy of a sentence: a frozen sentence, shared by
+    every sentence built the same way, whose hash and symbols are computed
+    once. The operands of interned sentences are interned too, so a
+    sentence is found among the interned ones in time proportional to its
+    number of operands, however deep it is.
+    """
+    if sentence.frozen:
+        return sentence
+    copies = {}
+
+    def copy(sentence):
+        if sentence.frozen:
+            return sentence
+        if id(sentence) in copies:
+            return copies[id(sentence)]
+        operands = tuple(copy(operand) for operand in sentence.operands())
+        key = (type(sentence), operands)
+        node = interned.get(key)
+        if node is None:
+            node = type(sentence)(*operands)
+            # Shared by every user of the sentence, so its operands must
+            # not change: keep them in a tuple rather than a list
+            if isinstance(node, And):
+                node.conjuncts = operands
+            elif isinstance(node, Or):
+                node.disjuncts = operands
+            node.cached_hash = hash(node)
+            node.cached_symbols = node.symbols()
+            node.frozen = True
+            interned[key] = node
+        copies[id(sentence)] = node
+        return node
+
+    return copy(sentence)
+
+
+class Encoding():
+    """
+    Tseitin encoding of sentences into the clauses of a SAT solver.
+
+    Every compound sentence gets a variable of its own, constrained by a
+    few clauses to be true exactly when the sentence is, so the clauses
+    grow linearly with the sentence rather than exponentially as with a
+    plain conversion to CNF. Identical subsentences share one variable.
+    """
+    def __init__(self, solver=None):
+        self.solver = sat.Solver() if solver is None else solver
+        # Maps symbol names to variables, and sentences to literals
+        self.variables = {}
+        self.literals = {}
+
+    def variable(self, name):
+        """Returns the variable of the symbol called `name`."""
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_var()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when `sentence` is."""
+        if not sentence.frozen:
+            sentence = intern(sentence)
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, And):
+            parts = [self.literal(c) for c in sentence.conjuncts]
+            v = self.solver.new_var()
+            for part in parts:
+                add([-v, part])
+            add([v] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(d) for d in sentence.disjuncts]
+            v = self.solver.new_var()
+            for part in parts:
+                add([v, -part])
+            add([-v] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.solver.new_var()
+            add([-v, -a, b])
+            add([v, a])
+            add([v, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.solver.new_var()
+            add([-v, -a, b])
+            add([-v, a, -b])
+            add([v, a, b])
+            add([v, -a, -b])
         else:
+            raise TypeError("must be a logical sentence")
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+        self.literals[sentence] = v
+        return v
+
+    def add(self, sentence, guard=None):
+        """
+        Adds clauses making `sentence` true. Conjunctions are split into
+        their conjuncts, and disjunctions become a single clause.
+        If `guard` is given, the clauses only apply when that literal is true.
+        """
+        prefix = [] if guard is None else [-guard]
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct, guard)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause(prefix + [
+                self.literal(disjunct) for disjunct in sentence.disjuncts])
+        else:
+            self.solver.add_clause(prefix + [self.literal(sentence)])
+
+
+class KnowledgeBase():
+    """
+    Knowledge base answering many queries with one incremental SAT solver.
+
+    Each sentence told is encoded once, guarded by an activation variable
+    of its own, and solving assumes the activation variables of the
+    sentences currently known. Retracting a sentence turns its activation
+    variable off for good. Clauses the solver learns while answering one
+    query hold for every later query, since any that depend on a sentence
+    mention its activation variable.
+    """
+    def __init__(self, *sentences):
+        self.encoding = Encoding()
+        self.solver = self.encoding.solver
+        # Maps each sentence told to its activation variable
+        self.activations = {}
+        self.solves = 0
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def tell(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        sentence = intern(sentence)
+        if sentence not in self.activations:
+            activation = self.solver.new_var()
+            self.encoding.add(sentence, guard=activation)
+            self.activations[sentence] = activation
+
+    def retract(self, sentence):
+        """Removes a sentence previously told to the knowledge base."""
+        sentence = intern(sentence)
+        if sentence not in self.activations:
+            raise ValueError("sentence not in knowledge base")
+        self.solver.add_clause([-self.activations.pop(sentence)])
+
+    def solve(self, assumptions=()):
+        self.solves += 1
+        return self.solver.solve(
+            list(self.activations.values()) + list(assumptions))
+
+    def consistent(self):
+        """Returns True if some model satisfies every sentence known."""
+        return self.solve()
+
+    def ask(self, query):
+        """Checks if the knowledge base entails query."""
+        return not self.solve([-self.encoding.literal(query)])
+
+    def ask_all(self, queries):
+        """
+        Returns a list telling, for each query, if the knowledge base
+        entails it. Every model found rules out all the queries it makes
+        false, so typically few queries need a solve of their own.
+        """
+        literals = [self.encoding.literal(query) for query in queries]
+        if not self.solve():
+            # Nothing satisfies the knowledge base, so it entails anything
+            return [True] * len(queries)
+
+        def rule_out(candidates):
+            model = self.solver.model
+            return [i for i in candidates
+                    if model[abs(literals[i])] == (literals[i] > 0)]
+
+        candidates = rule_out(range(len(queries)))
+        entailed = set()
+        while candidates:
+            i = candidates.pop()
+            if self.solve([-literals[i]]):
+                candidates = rule_out(candidates)
+            else:
+                entailed.add(i)
+        return [i in entailed for i in range(len(queries))]
+
+
+def count_models(knowledge):
+    """
+    Returns the number of models of the symbols in knowledge that make it
+    true. Every variable the Tseitin encoding adds is fixed by the
+    symbols, so this is the number of solutions of its clauses.
+    """
+    encoding = Encoding()
+    encoding.add(knowledge)
+    return sat.count_models(encoding.solver.formula(),
+                            encoding.solver.num_vars)
+
+
+def iter_models(knowledge):
+    """
+    Yields every model of the symbols in knowledge that makes it true, as
+    a dictionary from symbol names to values, one at a time.
+
+    Models are found by a depth-first search assigning the symbols in
+    order, which only enters a branch once the SAT solver has found a
+    model in it. That model gives the first leaf of the branch directly,
+    so each solve yields a model or closes a branch, and memory only grows
+    with the number of symbols, never with the number of models.
+    """
+    knowledge = intern(knowledge)
+    encoding = Encoding()
+    encoding.add(knowledge)
+    names = sorted(knowledge.symbols())
+    variables = [encoding.variable(name) for name in names]
+    solver = encoding.solver
+
+    # Assignments to a prefix of the symbols, still to be explored
+    stack = [[]]
+    while stack:
+        prefix = stack.pop()
+        if not solver.solve(prefix):
+            continue
+        model = solver.model
+
+        # Follow the model, leaving the other value of each symbol for later
+        assignment = list(prefix)
+        for variable in variables[len(prefix):]:
+            literal = variable if model[variable] else -variable
+            stack.append(assignment + [-literal])
+            assignment.append(literal)
+        yield {name: literal > 0 for name, literal in zip(names, assignment)}
+
+
+# Models checked at once by the bitwise method, as a power of 2
+CHUNK_BITS = 16
+
+# Operations of a compiled sentence
+SYMBOL = 0
+NOT = 1
+AND = 2
+OR = 3
+IMPLIES = 4
+IFF = 5
+
+
+def compile_bitwise(sentence, names, program, registers):
+    """
+    Appends the operations computing `sentence` to `program` and returns
+    the register holding its value. `names` maps symbol names to their
+    column, and `registers` maps already compiled sentences to registers.
+    """
+    if sentence in registers:
+        return registers[sentence]
+    if isinstance(sentence, Symbol):
+        operation = (SYMBOL, names[sentence.name])
+    elif isinstance(sentence, Not):
+        operation = (NOT, compile_bitwise(
+            sentence.operand, names, program, registers))
+    elif isinstance(sentence, And):
+        operation = (AND, [compile_bitwise(c, names, program, registers)
+                           for c in sentence.conjuncts])
+    elif isinstance(sentence, Or):
+        operation = (OR, [compile_bitwise(d, names, program, registers)
+                          for d in sentence.disjuncts])
+    elif isinstance(sentence, Implication):
+        operation = (IMPLIES, (
+            compile_bitwise(sentence.antecedent, names, program, registers),
+            compile_bitwise(sentence.consequent, names, program, registers)))
+    elif isinstance(sentence, Biconditional):
+        operation = (IFF, (
+            compile_bitwise(sentence.left, names, program, registers),
+            compile_bitwise(sentence.right, names, program, registers)))
+    else:
+        raise TypeError("must be a logical sentence")
+    program.append(operation)
+    registers[sentence] = len(program) - 1
+    return len(program) - 1
+
+
+def run_bitwise(program, columns, mask):
+    """
+    Runs a compiled program on many models at once. Bit k of columns[i]
+    is the value of symbol i in model k, and `mask` has a bit set for
+    every model. Returns the registers, each holding one bit per model.
+    """
+    values = []
+    for op, args in program:
+        if op == SYMBOL:
+            value = columns[args]
+        elif op == NOT:
+            value = mask ^ values[args]
+        elif op == AND:
+            value = mask
+            for arg in args:
+                value &= values[arg]
+        elif op == OR:
+            value = 0
+            for arg in args:
+                value |= values[arg]
+        elif op == IMPLIES:
+            value = (mask ^ values[args[0]]) | values[args[1]]
+        else:
+            value = mask ^ values[args[0]] ^ values[args[1]]
+        values.append(value)
+    return values
+
+
+def bitwise_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by evaluating both on every
+    model at once, one bit per model, in chunks of 2^CHUNK_BITS models.
+    """
+    knowledge = intern(knowledge)
+    query = intern(query)
+    names = sorted(knowledge.symbols() | query.symbols())
+    columns = {name: i for i, name in enumerate(names)}
+    program = []
+    registers = {}
+    kb = compile_bitwise(knowledge, columns, program, registers)
+    q = compile_bitwise(query, columns, program, registers)
+
+    # The first symbols vary within a chunk: symbol i alternates between
+    # runs of 2^i false and 2^i true models. The others are fixed per chunk
+    inner = min(len(names), CHUNK_BITS)
+    size = 1 << inner
+    mask = (1 << size) - 1
+    patterns = []
+    for i in range(inner):
+        run = 1 << i
+        block = ((1 << run) - 1) << run
+        patterns.append(block * (mask // ((1 << 2 * run) - 1)))
+
+    for chunk in range(1 << (len(names) - inner)):
+        fixed = [mask if chunk >> i & 1 else 0
+                 for i in range(len(names) - inner)]
+        values = run_bitwise(program, patterns + fixed, mask)
+        # A model where the knowledge holds but the query does not
+        if values[kb] & ~values[q]:
+            return False
+    return True
+
+
+def forced(sentence, value, model):
+    """
+    Returns a (symbol, value) assignment needed for `sentence` to take
+    `value`, given the partial model it is still undecided in, or None
+    if no single assignment is needed yet.
+    """
+    if isinstance(sentence, Symbol):
+        return sentence.name, value
+    if isinstance(sentence, Not):
+        return forced(sentence.operand, not value, model)
+    if isinstance(sentence, Implication):
+        antecedent = sentence.antecedent.evaluate_partial(model)
+        consequent = sentence.consequent.evaluate_partial(model)
+        if not value:
+            if antecedent is None:
+                return forced(sentence.antecedent, True, model)
+            return forced(sentence.consequent, False, model)
+        if antecedent is True:
+            return forced(sentence.consequent, True, model)
+        if consequent is False:
+            return forced(sentence.antecedent, False, model)
+        return None
+    if isinstance(sentence, Biconditional):
+        left = sentence.left.evaluate_partial(model)
+        right = sentence.right.evaluate_partial(model)
+        if left is not None:
+            return forced(sentence.right, left == value, model)
+        if right is not None:
+            return forced(sentence.left, right == value, model)
+        return None
+
+    # An And that must be true, or an Or that must be false, needs every
+    # undecided operand to take that value; otherwise only the last one
+    if isinstance(sentence, And):
+        every = value
+        operands = sentence.conjuncts
+    else:
+        every = not value
+        operands = sentence.disjuncts
+    undecided = [operand for operand in operands
+                 if operand.evaluate_partial(model) is None]
+    if every:
+        for operand in undecided:
+            assignment = forced(operand, value, model)
+            if assignment is not None:
+                return assignment
+        return None
+    if len(undecided) == 1:
+        return forced(undecided[0], value, model)
+    return None
+
+
+def occurrences(sentence, positive, model, signs, counts):
+    """
+    Records, for each symbol left out of the model that `sentence` still
+    depends on, the signs it occurs with (1 for positive, 2 for negative)
+    and how many times it occurs.
+    """
+    if sentence.evaluate_partial(model) is not None:
+        return
+    if isinstance(sentence, Symbol):
+        signs[sentence.name] = signs.get(sentence.name, 0) | (
+            1 if positive else 2)
+        counts[sentence.name] = counts.get(sentence.name, 0) + 1
+    elif isinstance(sentence, Not):
+        occurrences(sentence.operand, not positive, model, signs, counts)
+    elif isinstance(sentence, Implication):
+        occurrences(sentence.antecedent, not positive, model, signs, counts)
+        occurrences(sentence.consequent, positive, model, signs, counts)
+    elif isinstance(sentence, Biconditional):
+        for operand in (sentence.left, sentence.right):
+            occurrences(operand, positive, model, signs, counts)
+            occurrences(operand, not positive, model, signs, counts)
+    else:
+        for operand in sentence.operands():
+            occurrences(operand, positive, model, signs, counts)
+
+
+def counter_conjuncts(knowledge, query):
+    """
+    Returns the conjuncts that a model must all make true to show that
+    knowledge does not entail query: those of the knowledge and ¬query.
+    """
+    conjuncts = [Not(query)]
+    pending = [knowledge]
+    while pending:
+        sentence = pending.pop()
+        if isinstance(sentence, And):
+            pending.extend(sentence.conjuncts)
+        else:
+            conjuncts.append(sentence)
+    return conjuncts
+
+
+def check_all(conjuncts, model):
+    """
+    Checks that no model extending the partial `model` makes every one
+    of `conjuncts` true. `model` is left as it was given.
+    """
+    assigned = []
+    try:
+        while True:
+
+            # Stop as soon as the partial model settles the question
+            undecided = []
+            for conjunct in conjuncts:
+                value = conjunct.evaluate_partial(model)
+                if value is False:
+                    return True
+                if value is None:
+                    undecided.append(conjunct)
+            if not undecided:
+                return False
+
+            # Assign any symbol an undecided conjunct depends on alone
+            assignment = None
+            for conjunct in undecided:
+                assignment = forced(conjunct, True, model)
+                if assignment is not None:
+                    break
+
+            # Otherwise, give a symbol occurring with only one sign the
+            # value making it true: if any model makes every conjunct
+            # true, one with that value does
+            signs = {}
+            counts = {}
+            if assignment is None:
+                for conjunct in undecided:
+                    occurrences(conjunct, True, model, signs, counts)
+                for name in sorted(signs):
+                    if signs[name] != 3:
+                        assignment = (name, signs[name] == 1)
+                        break
+            if assignment is None:
+                break
+            model[assignment[0]] = assignment[1]
+            assigned.append(assignment[0])
+
+        # Branch on the symbol occurring most often
+        p = max(sorted(counts), key=counts.get)
+        for value in (True, False):
+            model[p] = value
+            entailed = check_all(conjuncts, model)
+            del model[p]
+            if not entailed:
+                return False
+        return True
+    finally:
+        for name in assigned:
+            del model[name]
+
+
+# Conjuncts checked by a worker process of parallel_check
+worker_conjuncts = None
+
+
+def start_worker(knowledge, query):
+    global worker_conjuncts
+    worker_conjuncts = counter_conjuncts(knowledge, query)
+
+
+def check_part(model):
+    return check_all(worker_conjuncts, model)
+
+
+def parallel_check(knowledge, query, processes=None, split=None):
+    """
+    Checks if knowledge base entails query by fixing the values of `split`
+    symbols, giving 2^split independent checks, and sharing them out
+    among `processes` worker processes. As soon as one check finds a model
+    where the knowledge holds and the query does not, the rest are stopped.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    conjuncts = counter_conjuncts(knowledge, query)
+
+    # Split on the symbols occurring most often, which settle the most
+    signs = {}
+    counts = {}
+    for conjunct in conjuncts:
+        occurrences(conjunct, True, {}, signs, counts)
+    if split is None:
+        # Several parts per process, so early finishers can take more
+        split = (4 * processes - 1).bit_length()
+    names = sorted(counts, key=lambda name: (-counts[name], name))[:split]
+    parts = [dict(zip(names, values))
+             for values in itertools.product([True, False], repeat=len(names))]
+
+    if processes <= 1:
+        return all(check_all(conjuncts, part) for part in parts)
+    with multiprocessing.Pool(processes, initializer=start_worker,
+                              initargs=(knowledge, query)) as pool:
+        for entailed in pool.imap_unordered(check_part, parts):
+            if not entailed:
+                # Leaving the block terminates the workers still checking
+                return False
+    return True
+
+
+def model_check(knowledge, query, method="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    With method="enumerate", every model of the symbols is checked.
+    With method="bitwise", every model is still checked, but many at a
+    time, as the bits of integers.
+    With method="parallel", the models are checked as with "enumerate",
+    split among a pool of processes.
+    With method="sat", the sentences are compiled to clauses and
+    knowledge entails query if knowledge ∧ ¬query is unsatisfiable.
+    """
+    if method == "parallel":
+        return parallel_check(knowledge, query)
+    if method == "bitwise":
+        return bitwise_check(knowledge, query)
+    if method == "sat":
+        encoding = Encoding()
+        encoding.add(knowledge)
+        return not encoding.solver.solve([-encoding.literal(query)])
+    if method != "enumerate":
+        raise ValueError(f"unknown method {method}")
 
     # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    return check_all(counter_conjuncts(knowledge, query), dict())
@@ -0,0 +1,521 @@
+"""
+Conflict-driven clause learning (CDCL) SAT solver.
+
+Variables are numbered from 1, and a literal is a variable (true) or its
+negation (false), as in the DIMACS format. Clauses are lists of literals.
+
+The solver assigns variables one decision at a time and propagates the
+consequences through two watched literals per clause, so only clauses
+watching a literal that just became false are ever looked at. When a
+clause is falsified, the implications leading to the conflict are traced
+back to the first unique implication point of the current decision level,
+and the clause learned from them is kept, so the same conflict is never
+reached twice. Learned clauses stay across calls to solve, which can be
+given assumptions: literals taken as true for that call only.
+"""
+
+import heapq
+from collections import OrderedDict
+
+# Conflicts between restarts, multiplied by the Luby sequence
+RESTART_BASE = 100
+
+# Rate at which the activity of variables in old conflicts fades
+ACTIVITY_DECAY = 0.95
+
+# Literals the model counter keeps in its cache of component counts, above
+# which the least recently used counts are dropped
+COUNT_CACHE_LIMIT = 1000000
+
+
+def code(literal):
+    """
+    Returns the index of a literal in per-literal lists.
+    """
+    return 2 * literal if literal > 0 else -2 * literal + 1
+
+
+def luby(i):
+    """
+    Returns the `i`th term, from 0, of the Luby sequence 1 1 2 1 1 2 4 ...
+    """
+    size = 1
+    while size < i + 1:
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        if i >= size:
+            i -= size
+    return (size + 1) // 2
+
+
+class Solver():
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        self.learned = []
+
+        # Clauses watching each literal, visited when it becomes false
+        self.watches = [[], []]
+
+        # Per variable: assigned value, decision level, implying clause,
+        # activity and last value assigned
+        self.assigns = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.trail_lim = []
+        self.queue_head = 0
+
+        # Assumptions of the last call to solve. Their decision levels are
+        # kept after it returns, for a next call sharing some of them
+        self.assumed = []
+
+        # Unassigned variables by activity, with stale entries skipped
+        self.heap = []
+        self.increment = 1.0
+
+        # False once the clauses are known to be unsatisfiable
+        self.ok = True
+        self.model = None
+        self.stats = {"decisions": 0, "propagations": 0, "conflicts": 0,
+                      "learned": 0, "restarts": 0}
+
+    def new_var(self):
+        """
+        Adds a variable and returns its number.
+        """
+        self.num_vars += 1
+        self.watches += [[], []]
+        self.assigns.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        heapq.heappush(self.heap, (0.0, self.num_vars))
+        return self.num_vars
+
+    def value(self, literal):
+        """
+        Returns True or False if the literal is assigned, None otherwise.
+        """
+        value = self.assigns[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, creating any variables it mentions.
+        Returns False if the clauses became unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+
+        clause = []
+        for literal in literals:
+            while abs(literal) > self.num_vars:
+                self.new_var()
+            value = self.value(literal)
+            if value is True or -literal in clause:
+                # Already satisfied, or always true
+                return True
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+            self.clauses.append(clause)
+        return self.ok
+
+    def formula(self):
+        """
+        Returns clauses equivalent to those added so far: the clauses kept,
+        and a unit clause for each literal known to hold.
+        """
+        if not self.ok:
+            return [[]]
+        level_zero = self.trail_lim[0] if self.trail_lim else len(self.trail)
+        return ([list(clause) for clause in self.clauses]
+                + [[literal] for literal in self.trail[:level_zero]])
+
+    def attach(self, clause):
+        self.watches[code(clause[0])].append(clause)
+        self.watches[code(clause[1])].append(clause)
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def enqueue(self, literal, reason):
+        variable = abs(literal)
+        self.assigns[variable] = literal > 0
+        self.levels[variable] = len(self.trail_lim)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by the assignments not yet propagated.
+        Returns a clause made false, or None if there is no conflict.
+        """
+        assigns = self.assigns
+        while self.queue_head < len(self.trail):
+            literal = self.trail[self.queue_head]
+            self.queue_head += 1
+            self.stats["propagations"] += 1
+            false_literal = -literal
+            watchers = self.watches[code(false_literal)]
+            kept = []
+            self.watches[code(false_literal)] = kept
+
+            i = 0
+            while i < len(watchers):
+                clause = watchers[i]
+                i += 1
+                # Keep the false literal second
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                value = assigns[abs(first)]
+                if value is not None and value == (first > 0):
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal that is not false to watch
+                for k in range(2, len(clause)):
+                    other = clause[k]
+                    value = assigns[abs(other)]
+                    if value is None or value == (other > 0):
+                        clause[1], clause[k] = other, false_literal
+                        self.watches[code(other)].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if assigns[abs(first)] is not None:
+                        # Every literal is false
+                        kept.extend(watchers[i:])
+                        self.queue_head = len(self.trail)
+                        return clause
+                    self.enqueue(first, clause)
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (clause, level): the clause learned from a conflict, with its
+        first unique implication point first, and the level to go back to.
+        """
+        level = self.decision_level()
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                variable = abs(other)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Step back to the last assigned literal involved
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal assigned last, so the clause propagates on return
+        deepest = max(range(1, len(learned)),
+                      key=lambda k: self.levels[abs(learned[k])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            # Rescale before the activities overflow
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, self.num_vars + 1)
+                         if self.assigns[v] is None]
+            heapq.heapify(self.heap)
+        elif self.assigns[variable] is None:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def cancel_until(self, level):
+        """
+        Undoes every assignment made above decision level `level`.
+        """
+        if self.decision_level() <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phase[variable] = self.assigns[variable]
+            self.assigns[variable] = None
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.queue_head = len(self.trail)
+
+    def pick(self):
+        """
+        Returns the most active unassigned variable, or None if there is none.
+        """
+        while self.heap:
+            _, variable = heapq.heappop(self.heap)
+            if self.assigns[variable] is None:
+                return variable
+        return None
+
+    def new_level(self):
+        self.trail_lim.append(len(self.trail))
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses, together with the `assumptions` taken
+        as true, are satisfiable, leaving a satisfying assignment in
+        self.model as a list of values indexed by variable.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        for literal in assumptions:
+            while abs(literal) > self.num_vars:
+                self.new_var()
+
+        # Only redo the assumptions that differ from the last call's
+        shared = 0
+        while (shared < min(len(assumptions), len(self.assumed),
+                            self.decision_level())
+               and assumptions[shared] == self.assumed[shared]):
+            shared += 1
+        self.cancel_until(shared)
+        self.assumed = list(assumptions)
+
+        restarts = 0
+        budget = RESTART_BASE * luby(restarts)
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.stats["conflicts"] += 1
+                conflicts += 1
+                if self.decision_level() == 0:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.cancel_until(level)
+                if len(learned) == 1:
+                    self.enqueue(learned[0], None)
+                else:
+                    self.attach(learned)
+                    self.learned.append(learned)
+                    self.stats["learned"] += 1
+                    self.enqueue(learned[0], learned)
+                self.increment /= ACTIVITY_DECAY
+
+                if conflicts >= budget:
+                    self.stats["restarts"] += 1
+                    self.cancel_until(len(assumptions))
+                    restarts += 1
+                    budget = RESTART_BASE * luby(restarts)
+                    conflicts = 0
+                continue
+
+            # Decide the assumptions first, one level each
+            level = self.decision_level()
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value is False:
+                    return False
+                self.new_level()
+                if value is None:
+                    self.enqueue(literal, None)
+                continue
+
+            variable = self.pick()
+            if variable is None:
+                self.model = list(self.assigns)
+                self.cancel_until(len(assumptions))
+                return True
+            self.stats["decisions"] += 1
+            self.new_level()
+            self.enqueue(variable if self.phase[variable] else -variable, None)
+
+
+def count_models(clauses, num_vars):
+    """
+    Returns the number of assignments to variables 1 to `num_vars` that
+    satisfy every clause. Clauses sharing no variable are counted apart
+    and the counts multiplied, and the count of every such component is
+    cached for the rest of the call, since the same components come up on
+    many branches. The cache holds at most COUNT_CACHE_LIMIT literals.
+    """
+    clauses = [frozenset(clause) for clause in clauses]
+    if not all(clauses):
+        return 0
+    unmentioned = num_vars - len(variables_of(clauses))
+    return count(clauses, CountCache()) * 2 ** unmentioned
+
+
+class CountCache():
+    """
+    Model counts of components, keyed by their clauses as a sorted tuple of
+    sorted tuples of literals. Once the keys hold more than `limit`
+    literals, the counts used least recently are dropped.
+    """
+    def __init__(self, limit=COUNT_CACHE_LIMIT):
+        self.counts = OrderedDict()
+        self.limit = limit
+        self.size = 0
+
+    @staticmethod
+    def key(clauses):
+        return tuple(sorted(tuple(sorted(clause)) for clause in clauses))
+
+    def get(self, key):
+        total = self.counts.get(key)
+        if total is not None:
+            self.counts.move_to_end(key)
+        return total
+
+    def put(self, key, total):
+        self.counts[key] = total
+        self.size += sum(len(clause) for clause in key)
+        while self.size > self.limit:
+            old, _ = self.counts.popitem(last=False)
+            self.size -= sum(len(clause) for clause in old)
+
+
+def variables_of(clauses):
+    return {abs(literal) for clause in clauses for literal in clause}
+
+
+def condition(clauses, literal):
+    """
+    Returns the clauses left once `literal` is true,
+    or None if that makes one of them false.
+    """
+    result = []
+    for clause in clauses:
+        if literal in clause:
+            continue
+        if -literal in clause:
+            clause = clause - {-literal}
+            if not clause:
+                return None
+        result.append(clause)
+    return result
+
+
+def components(clauses):
+    """
+    Returns the clauses split into groups sharing no variable.
+    """
+    parent = {}
+
+    def find(variable):
+        while parent[variable] != variable:
+            parent[variable] = parent[parent[variable]]
+            variable = parent[variable]
+        return variable
+
+    for clause in clauses:
+        roots = []
+        for literal in clause:
+            parent.setdefault(abs(literal), abs(literal))
+            roots.append(find(abs(literal)))
+        for root in roots[1:]:
+            parent[find(root)] = find(roots[0])
+
+    groups = {}
+    for clause in clauses:
+        root = find(abs(next(iter(clause))))
+        groups.setdefault(root, []).append(clause)
+    return list(groups.values())
+
+
+def count(clauses, cache):
+    """
+    Returns the number of assignments to the variables in `clauses`
+    that satisfy all of them.
+    """
+    if not clauses:
+        return 1
+    variables = len(variables_of(clauses))
+
+    # Unit clauses leave their variable a single value
+    simplified = clauses
+    assigned = 0
+    while simplified is not None:
+        unit = next((c for c in simplified if len(c) == 1), None)
+        if unit is None:
+            break
+        simplified = condition(simplified, next(iter(unit)))
+        assigned += 1
+
+    if simplified is None:
+        total = 0
+    else:
+        # Variables that disappeared without a value can take either one
+        total = 2 ** (variables - assigned - len(variables_of(simplified)))
+        for component in components(simplified):
+            total *= split(component, cache)
+            if total == 0:
+                break
+    return total
+
+
+def split(clauses, cache):
+    """
+    Counts the models of a component without units by trying both values
+    of the variable occurring most often, unless its count is cached.
+    """
+    key = cache.key(clauses)
+    total = cache.get(key)
+    if total is not None:
+        return total
+
+    occurrences = {}
+    for clause in clauses:
+        for literal in clause:
+            occurrences[abs(literal)] = occurrences.get(abs(literal), 0) + 1
+    variable = max(occurrences, key=occurrences.get)
+
+    total = 0
+    for literal in (variable, -variable):
+        conditioned = condition(clauses, literal)
+        if conditioned is not None:
+            vanished = len(occurrences) - 1 - len(variables_of(conditioned))
+            total += count(conditioned, cache) * 2 ** vanished
+    cache.put(key, total)
+    return total